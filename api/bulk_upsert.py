@@ -0,0 +1,108 @@
+import datetime
+from collections import namedtuple
+
+from sqlalchemy import bindparam, insert, select, update
+
+from api.models import JobOffer
+
+# Nombre de lignes envoyées par requête (executemany)
+UPSERT_CHUNK_SIZE = 500
+
+# duplicates: lignes remplacées par une version plus récente de la même offre dans le même lot (non écrites)
+UpsertResult = namedtuple('UpsertResult', ['inserted', 'updated', 'unchanged', 'failed', 'duplicates'])
+
+# Colonnes comparées pour détecter une mise à jour (la clé technique et la date d'ajout ne changent pas)
+UPSERT_COLUMNS = [column.name for column in JobOffer.__table__.columns if column.name not in ('id', 'date_added')]
+
+
+def _conflict_insert(dialect_name, table):
+    """Construire un INSERT ... ON CONFLICT(offer_id) DO UPDATE pour les bases qui le supportent"""
+    if dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return None
+    stmt = dialect_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=['offer_id'],
+        set_={name: stmt.excluded[name] for name in UPSERT_COLUMNS if name != 'offer_id'}
+    )
+
+
+def _upsert_chunk(conn, table, rows, today):
+    """Insérer ou mettre à jour un lot de lignes; retourne (insérées, mises à jour, inchangées)"""
+    offer_ids = [row['offer_id'] for row in rows]
+    existing = {
+        row.offer_id: row
+        for row in conn.execute(select(*[table.c[name] for name in UPSERT_COLUMNS])
+                                .where(table.c.offer_id.in_(offer_ids)))
+    }
+
+    new_rows = []
+    changed_rows = []
+    unchanged = 0
+    for row in rows:
+        values = {name: row.get(name) for name in UPSERT_COLUMNS}
+        current = existing.get(row['offer_id'])
+        if current is None:
+            new_rows.append({**values, 'date_added': row.get('date_added') or today})
+        elif any(getattr(current, name) != values[name] for name in UPSERT_COLUMNS):
+            changed_rows.append(values)
+        else:
+            unchanged += 1
+
+    upsert = _conflict_insert(conn.dialect.name, table)
+    if upsert is not None:
+        # Un seul aller-retour pour le lot; une collision sur offer_id devient une mise à jour
+        if new_rows or changed_rows:
+            conn.execute(upsert, new_rows + [{**values, 'date_added': today} for values in changed_rows])
+    else:
+        # Repli portable: INSERT pour les nouvelles lignes, UPDATE par offer_id pour les autres
+        if new_rows:
+            conn.execute(insert(table), new_rows)
+        if changed_rows:
+            stmt = (update(table)
+                    .where(table.c.offer_id == bindparam('b_offer_id'))
+                    .values({name: bindparam(name) for name in UPSERT_COLUMNS if name != 'offer_id'}))
+            conn.execute(stmt, [{**values, 'b_offer_id': values['offer_id']} for values in changed_rows])
+
+    return len(new_rows), len(changed_rows), unchanged
+
+
+def upsert_job_offers(engine, rows, chunk_size=UPSERT_CHUNK_SIZE, log=print):
+    """Insérer ou mettre à jour des offres par lots, chaque lot dans sa propre transaction
+
+    rows est un itérable de dicts dont les clés sont les colonnes de JobOffer (offer_id obligatoire).
+    Un lot en erreur est annulé seul et compté dans failed, les autres lots sont conservés.
+    """
+    table = JobOffer.__table__
+    today = datetime.datetime.now().date()
+    inserted = updated = unchanged = failed = duplicates = 0
+
+    chunk = {}
+
+    def flush(chunk):
+        nonlocal inserted, updated, unchanged, failed
+        try:
+            with engine.begin() as conn:
+                chunk_inserted, chunk_updated, chunk_unchanged = _upsert_chunk(conn, table, list(chunk.values()), today)
+            inserted += chunk_inserted
+            updated += chunk_updated
+            unchanged += chunk_unchanged
+        except Exception as e:
+            failed += len(chunk)
+            log(f"Erreur lors de l'écriture d'un lot de {len(chunk)} offres: {str(e)}")
+
+    for row in rows:
+        if row['offer_id'] in chunk:
+            # Doublon dans le même lot: la dernière version l'emporte, la précédente est comptée à part
+            duplicates += 1
+        chunk[row['offer_id']] = row
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = {}
+    if chunk:
+        flush(chunk)
+
+    return UpsertResult(inserted, updated, unchanged, failed, duplicates)
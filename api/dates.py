@@ -0,0 +1,97 @@
+import datetime
+import threading
+from collections import Counter
+from functools import lru_cache
+
+# Formats acceptés, dans l'ordre: format du site (JJ/MM/AAAA), puis ISO (API, exports)
+DATE_FORMATS = ("%d/%m/%Y", "%Y-%m-%d")
+
+# Valeurs illisibles rencontrées depuis le démarrage (ou la dernière remise à zéro): valeur -> occurrences.
+# Au-delà de _MAX_FAILURE_VALUES valeurs distinctes, les nouvelles sont regroupées sous _OTHER_FAILURES.
+_failures = Counter()
+_MAX_FAILURE_VALUES = 1000
+_OTHER_FAILURES = '(autres valeurs)'
+_failures_lock = threading.Lock()
+
+
+@lru_cache(maxsize=4096)
+def _parse_text(text):
+    """Analyser une chaîne non vide; le corpus n'a que quelques centaines de dates distinctes"""
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _record_failure(value, count=1):
+    with _failures_lock:
+        if value not in _failures and len(_failures) >= _MAX_FAILURE_VALUES:
+            value = _OTHER_FAILURES
+        _failures[value] += count
+
+
+def parse_date(value, record_failures=True):
+    """Convertir une date (chaîne JJ/MM/AAAA ou AAAA-MM-JJ, date, datetime) en date
+
+    Les valeurs vides donnent None; les valeurs illisibles donnent None et sont comptées, sauf avec
+    record_failures=False (saisies des utilisateurs de l'API, qui ne sont pas des données importées).
+    """
+    if value is None or value != value:  # None ou NaN (cellule vide de pandas)
+        return None
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    text = str(value).strip()
+    if not text:
+        return None
+    result = _parse_text(text)
+    if result is None and record_failures:
+        _record_failure(text)
+    return result
+
+
+def parse_date_column(values):
+    """Convertir une colonne entière (Series ou liste) en dates, pour les importations par lots
+
+    La colonne est factorisée: chaque valeur distincte n'est analysée qu'une fois, puis le résultat est
+    redistribué sur toutes les lignes. Retourne une Series d'objets date (None si vide ou illisible).
+    """
+    # pandas n'est requis que par les importations par lots, pas par l'API qui n'utilise que parse_date
+    import numpy as np
+    import pandas as pd
+
+    text = pd.Series(values, dtype=object).fillna('').astype(str).str.strip()
+    codes, uniques = pd.factorize(text)
+    parsed = np.array([_parse_text(value) if value else None for value in uniques] + [None], dtype=object)
+
+    failed = [position for position, value in enumerate(uniques) if value and parsed[position] is None]
+    if failed:
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        for position in failed:
+            _record_failure(uniques[position], int(counts[position]))
+    # Le code -1 (valeur manquante) pointe sur le None ajouté en fin de tableau
+    return pd.Series(parsed[codes], index=text.index, dtype=object)
+
+
+def date_failures():
+    """Copie des valeurs illisibles comptées: {valeur: occurrences}"""
+    with _failures_lock:
+        return dict(_failures)
+
+
+def describe_date_failures(limit=5):
+    """Résumé lisible des dates illisibles pour les logs, chaîne vide s'il n'y en a pas"""
+    with _failures_lock:
+        if not _failures:
+            return ""
+        examples = ', '.join(f"'{value}' ({count})" for value, count in _failures.most_common(limit))
+        return f"{sum(_failures.values())} dates illisibles ({len(_failures)} valeurs distinctes): {examples}"
+
+
+def reset_date_failures():
+    """Remettre à zéro le décompte des dates illisibles (par exemple au début d'une importation)"""
+    with _failures_lock:
+        _failures.clear()
@@ -0,0 +1,64 @@
+import datetime
+import hashlib
+import re
+import unicodedata
+
+from sqlalchemy import delete, insert
+
+from api.bulk_upsert import UPSERT_COLUMNS
+from api.models import OfferFingerprint
+
+# Colonnes de contenu prises en compte dans l'empreinte d'une offre
+FINGERPRINT_COLUMNS = [name for name in UPSERT_COLUMNS if name != 'offer_id']
+
+# Nombre d'empreintes écrites par requête
+FINGERPRINT_CHUNK_SIZE = 500
+
+# Diacritiques séparés par la décomposition NFKD, et mots alphanumériques
+_COMBINING_MARKS = re.compile(r'[\u0300-\u036f]')
+_WORD = re.compile(r'[^\W_]+')
+
+
+def _normalize(value):
+    """Représentation stable d'une valeur: dates ISO, espaces fusionnés, None comme chaîne vide"""
+    if value is None:
+        return ''
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return ' '.join(str(value).split())
+
+
+def normalize_words(value):
+    """Mots comparables d'un texte: accents retirés, minuscules, ponctuation ignorée"""
+    text = _COMBINING_MARKS.sub('', unicodedata.normalize('NFKD', _normalize(value))).casefold()
+    return _WORD.findall(text)
+
+
+def normalize_text(value):
+    """Texte comparable: mots normalisés séparés par une espace"""
+    return ' '.join(normalize_words(value))
+
+
+def stable_offer_id(title, entreprise):
+    """ID d'une offre sans ID d'origine, identique d'une exécution à l'autre (SHA-1 du titre et de l'entreprise)"""
+    key = f"{normalize_text(title)}\x1f{normalize_text(entreprise)}"
+    return f"gen_{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}"
+
+
+def offer_fingerprint(row):
+    """Empreinte SHA-1 des champs de contenu d'une offre (dict aux colonnes de JobOffer)"""
+    digest = hashlib.sha1()
+    for name in FINGERPRINT_COLUMNS:
+        digest.update(_normalize(row.get(name)).encode('utf-8'))
+        digest.update(b'\x1f')
+    return digest.hexdigest()
+
+
+def save_fingerprints(engine, entries):
+    """Remplacer les empreintes des offres indiquées (liste de dicts aux colonnes de OfferFingerprint)"""
+    table = OfferFingerprint.__table__
+    for i in range(0, len(entries), FINGERPRINT_CHUNK_SIZE):
+        chunk = entries[i:i + FINGERPRINT_CHUNK_SIZE]
+        with engine.begin() as conn:
+            conn.execute(delete(table).where(table.c.offer_id.in_([entry['offer_id'] for entry in chunk])))
+            conn.execute(insert(table), chunk)
@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import or_, and_, func, desc
 from typing import List, Optional
 import datetime
-from dateutil import parser
+from api.dates import parse_date
 from contextlib import asynccontextmanager
 import sys
 import os
@@ -148,6 +148,15 @@ def get_filter_values(field: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération des valeurs de filtre: {str(e)}")
 
 
+def parse_query_date(name, value):
+    """Date d'un paramètre de requête (JJ/MM/AAAA ou AAAA-MM-JJ); erreur 400 si elle est illisible"""
+    parsed = parse_date(value, record_failures=False)
+    if parsed is None:
+        raise HTTPException(status_code=400,
+                            detail=f"Date invalide pour {name}: '{value}' (formats acceptés: JJ/MM/AAAA, AAAA-MM-JJ)")
+    return parsed
+
+
 @app.get("/jobs/", response_model=List[JobOfferResponse])
 def search_jobs(
         q: Optional[str] = Query(None, description="Mots-clés de recherche"),
@@ -201,18 +210,10 @@ def search_jobs(
 
     # Filtrage par date
     if date_from:
-        try:
-            date_from_obj = parser.parse(date_from).date()
-            query = query.filter(JobOffer.date_publication >= date_from_obj)
-        except:
-            pass
+        query = query.filter(JobOffer.date_publication >= parse_query_date("date_from", date_from))
 
     if date_to:
-        try:
-            date_to_obj = parser.parse(date_to).date()
-            query = query.filter(JobOffer.date_publication <= date_to_obj)
-        except:
-            pass
+        query = query.filter(JobOffer.date_publication <= parse_query_date("date_to", date_to))
 
     # Filtrer les offres expirées
     if exclude_expired:
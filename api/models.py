@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Date, DateTime, Boolean, ForeignKey, create_engine
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, Boolean, ForeignKey, LargeBinary, create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
 from pydantic import BaseModel
@@ -37,6 +37,42 @@ class JobOffer(Base):
         return f"<JobOffer(id={self.id}, title='{self.title}', entreprise='{self.entreprise}')>"
 
 
+class OfferFingerprint(Base):
+    """Empreinte du contenu d'une offre, pour ne réécrire que les offres modifiées lors d'un rafraîchissement"""
+    __tablename__ = "offer_fingerprints"
+
+    offer_id = Column(String, primary_key=True)  # ID d'origine du site (job_offers.offer_id)
+    fingerprint = Column(String(40), nullable=False)
+    checked_at = Column(DateTime, index=True)  # Dernière vérification sur le site
+    changed_at = Column(DateTime)  # Dernier changement de contenu détecté
+
+    def __repr__(self):
+        return f"<OfferFingerprint(offer_id='{self.offer_id}', fingerprint='{self.fingerprint}')>"
+
+
+class OfferSignature(Base):
+    """Signature MinHash du texte d'une offre, pour repérer les republications quasi identiques"""
+    __tablename__ = "offer_signatures"
+
+    offer_id = Column(String, primary_key=True)  # job_offers.offer_id
+    title_key = Column(String(16))  # Empreinte du titre normalisé: une republication garde son titre
+    signature = Column(LargeBinary)  # Valeurs minimales en uint32, vide si le texte est trop court
+
+    def __repr__(self):
+        return f"<OfferSignature(offer_id='{self.offer_id}')>"
+
+
+class OfferLSHBucket(Base):
+    """Seau LSH d'une bande de signature: les offres qui partagent un seau sont candidates au rapprochement"""
+    __tablename__ = "offer_lsh_buckets"
+
+    bucket = Column(String(16), primary_key=True)  # Empreinte du numéro de bande et de ses valeurs
+    offer_id = Column(String, primary_key=True)
+
+    def __repr__(self):
+        return f"<OfferLSHBucket(bucket='{self.bucket}', offer_id='{self.offer_id}')>"
+
+
 # Modèles Pydantic pour l'API
 class JobOfferBase(BaseModel):
     """Schéma de base pour les offres d'emploi"""
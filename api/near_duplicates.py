@@ -0,0 +1,231 @@
+"""Détection des offres quasi identiques (republications sous un nouvel ID) par MinHash et LSH
+
+Le texte d'une offre (titre, entreprise, lieu, métier, descriptions) est découpé en shingles de 3 mots;
+sa signature MinHash de 128 valeurs estime la similarité de Jaccard avec une autre offre. La signature
+est découpée en 16 bandes de 8 valeurs: deux offres qui partagent une bande tombent dans le même seau
+et deviennent candidates, et seules les candidates sont comparées. L'index (tables offer_signatures et
+offer_lsh_buckets) est persistant et complété à chaque importation: une recherche ne lit que les seaux
+de l'offre, quelle que soit la taille de la base.
+
+Les annonces d'un même recruteur reprennent souvent le même modèle (répétiteur d'anglais, d'allemand...):
+une offre n'est considérée comme republiée que si son titre normalisé est aussi identique.
+
+Utilisation en ligne de commande (indexer les offres de la base qui ne le sont pas encore):
+    python -m api.near_duplicates [--db sqlite:///educarriere_jobs.db] [--rebuild]
+"""
+import argparse
+import hashlib
+import time
+import zlib
+from collections import defaultdict
+
+import numpy as np
+from sqlalchemy import delete, insert, select
+
+from api.fingerprints import normalize_text, normalize_words
+from api.models import JobOffer, OfferLSHBucket, OfferSignature, create_tables, get_engine
+
+# Paramètres MinHash/LSH: avec 16 bandes de 8 valeurs, deux offres similaires à 70% ont environ 6 chances
+# sur 10 de partager un seau, à 80% plus de 9 sur 10
+NUM_PERM = 128
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+
+# Similarité estimée à partir de laquelle une offre est un quasi-doublon d'une offre indexée
+SIMILARITY_THRESHOLD = 0.8
+
+# En dessous de ce nombre de shingles (offre sans description), le texte est trop court pour conclure
+MIN_SHINGLES = 8
+
+# Champs du texte comparé; description_complete reprend déjà le poste et le profil quand elle est présente
+TEXT_FIELDS = ('title', 'entreprise', 'lieu', 'metier')
+DESCRIPTION_FIELDS = ('description_poste', 'profil_poste')
+
+# Nombre de clés par requête IN
+QUERY_CHUNK_SIZE = 500
+
+# Permutations fixes (graine constante): les signatures enregistrées restent comparables d'une exécution à l'autre.
+# Hachage multiplicatif (a*x + b) sur 64 bits dont on garde les 32 bits de poids fort, a impair.
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_SHIFT = np.uint64(32)
+_SHINGLE_MULTIPLIER = np.uint64(1000003)
+_random = np.random.RandomState(20250302)
+_PERM_A = _random.randint(0, 1 << 63, NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_PERM_B = _random.randint(0, 1 << 63, NUM_PERM, dtype=np.uint64)
+
+
+def offer_shingles(row):
+    """Shingles distincts du texte d'une offre, hachés sur 32 bits (tableau uint64)
+
+    Chaque mot est haché une fois (CRC32), puis les hachages de 3 mots consécutifs sont combinés par
+    opérations vectorielles, sans construire de chaîne par shingle.
+    """
+    fields = TEXT_FIELDS + (('description_complete',) if row.get('description_complete') else DESCRIPTION_FIELDS)
+    words = normalize_words(' '.join(str(row.get(field) or '') for field in fields))
+    if len(words) < SHINGLE_SIZE:
+        return np.empty(0, dtype=np.uint64)
+    hashes = np.fromiter((zlib.crc32(word.encode('utf-8')) for word in words), dtype=np.uint64, count=len(words))
+    count = len(words) - SHINGLE_SIZE + 1
+    combined = hashes[:count].copy()
+    for offset in range(1, SHINGLE_SIZE):
+        combined = combined * _SHINGLE_MULTIPLIER + hashes[offset:offset + count]
+    return np.unique(combined & _MAX_HASH)
+
+
+def minhash_signature(row):
+    """Signature MinHash (uint32, NUM_PERM valeurs) d'une offre, None si son texte est trop court"""
+    shingles = offer_shingles(row)
+    if len(shingles) < MIN_SHINGLES:
+        return None
+    # Les NUM_PERM permutations sont appliquées à tous les shingles à la fois (débordement sur 64 bits voulu)
+    hashed = (np.outer(shingles, _PERM_A) + _PERM_B) >> _SHIFT
+    return hashed.min(axis=0).astype(np.uint32)
+
+
+def title_key(row):
+    """Empreinte courte du titre normalisé d'une offre"""
+    return hashlib.sha1(normalize_text(row.get('title')).encode('utf-8')).hexdigest()[:16]
+
+
+def band_buckets(signature):
+    """Clés des seaux LSH d'une signature, une par bande (le numéro de bande fait partie de la clé)"""
+    return [hashlib.sha1(bytes([band]) + signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes())
+            .hexdigest()[:16] for band in range(BANDS)]
+
+
+def signature_similarity(signature, other):
+    """Similarité de Jaccard estimée: part des valeurs minimales identiques"""
+    return float(np.count_nonzero(signature == other)) / NUM_PERM
+
+
+class NearDuplicateIndex:
+    """Index LSH persistant des signatures MinHash des offres de la base"""
+
+    def __init__(self, engine, threshold=SIMILARITY_THRESHOLD):
+        self.engine = engine
+        self.threshold = threshold
+
+    @staticmethod
+    def _bucket_members(conn, buckets):
+        """{seau: [offer_id]} pour les seaux demandés"""
+        table = OfferLSHBucket.__table__
+        buckets = list(buckets)
+        members = defaultdict(list)
+        for i in range(0, len(buckets), QUERY_CHUNK_SIZE):
+            chunk = buckets[i:i + QUERY_CHUNK_SIZE]
+            for bucket, offer_id in conn.execute(select(table.c.bucket, table.c.offer_id)
+                                                 .where(table.c.bucket.in_(chunk))):
+                members[bucket].append(offer_id)
+        return members
+
+    @staticmethod
+    def _signatures(conn, offer_ids):
+        """{offer_id: (empreinte du titre, signature)} pour les offres demandées (textes trop courts omis)"""
+        table = OfferSignature.__table__
+        offer_ids = list(offer_ids)
+        signatures = {}
+        for i in range(0, len(offer_ids), QUERY_CHUNK_SIZE):
+            chunk = offer_ids[i:i + QUERY_CHUNK_SIZE]
+            for offer_id, key, signature in conn.execute(select(table.c.offer_id, table.c.title_key, table.c.signature)
+                                                         .where(table.c.offer_id.in_(chunk))):
+                if signature:
+                    signatures[offer_id] = (key, np.frombuffer(signature, dtype=np.uint32))
+        return signatures
+
+    def filter(self, rows):
+        """Séparer les nouvelles offres des quasi-doublons d'offres déjà indexées ou d'une ligne précédente du lot
+
+        Retourne (lignes à garder, entrées d'index à enregistrer avec elles via save(),
+        quasi-doublons [(offer_id, offer_id de l'offre d'origine, similarité)]). Une candidate ne compte que
+        si son titre normalisé est identique.
+        """
+        prepared = [self._entry(row) for row in rows]
+
+        with self.engine.connect() as conn:
+            members = self._bucket_members(conn, {bucket for entry in prepared for bucket in entry[3]})
+            signatures = self._signatures(conn, {offer_id for ids in members.values() for offer_id in ids})
+
+        kept, entries, duplicates = [], [], []
+        for row, entry in zip(rows, prepared):
+            offer_id, key, signature, buckets = entry
+            if signature is not None:
+                candidates = {candidate for bucket in buckets for candidate in members.get(bucket, ())}
+                candidates.discard(offer_id)
+                best = max(((signature_similarity(signature, signatures[candidate][1]), candidate)
+                            for candidate in candidates
+                            if candidate in signatures and signatures[candidate][0] == key), default=None)
+                if best is not None and best[0] >= self.threshold:
+                    duplicates.append((offer_id, best[1], best[0]))
+                    continue
+                # Les lignes gardées servent de référence aux lignes suivantes du même lot
+                signatures[offer_id] = (key, signature)
+                for bucket in buckets:
+                    members[bucket].append(offer_id)
+            kept.append(row)
+            entries.append(entry)
+        return kept, entries, duplicates
+
+    @staticmethod
+    def _entry(row):
+        """Entrée d'index d'une offre: (offer_id, empreinte du titre, signature ou None, seaux)"""
+        signature = minhash_signature(row)
+        return row['offer_id'], title_key(row), signature, band_buckets(signature) if signature is not None else []
+
+    @staticmethod
+    def save(conn, entries):
+        """Enregistrer des entrées d'index (dans la transaction qui insère les offres correspondantes)"""
+        if not entries:
+            return
+        conn.execute(insert(OfferSignature.__table__),
+                     [{'offer_id': offer_id, 'title_key': key,
+                       'signature': signature.tobytes() if signature is not None else b''}
+                      for offer_id, key, signature, _ in entries])
+        buckets = [{'bucket': bucket, 'offer_id': offer_id} for offer_id, _, _, entry_buckets in entries
+                   for bucket in entry_buckets]
+        if buckets:
+            conn.execute(insert(OfferLSHBucket.__table__), buckets)
+
+    def sync(self, batch_size=1000, log=print):
+        """Indexer les offres de la base absentes de l'index (ajoutées par le scraper ou avant l'index)
+
+        Seules les offres manquantes sont lues (jointure externe sur offer_signatures), par lots de batch_size
+        lignes: la lecture et l'écriture passent par la même connexion et la même transaction, SQLite ne
+        permettant pas d'écrire depuis une autre connexion tant que la lecture est en cours. Retourne leur nombre.
+        """
+        offers = JobOffer.__table__
+        signed = OfferSignature.__table__
+        query = (select(offers)
+                 .outerjoin(signed, signed.c.offer_id == offers.c.offer_id)
+                 .where(signed.c.offer_id.is_(None), offers.c.offer_id.is_not(None)))
+        start = time.perf_counter()
+        indexed = 0
+        with self.engine.begin() as conn:
+            result = conn.execution_options(yield_per=batch_size).execute(query)
+            for rows in result.mappings().partitions():
+                self.save(conn, [self._entry(row) for row in rows])
+                indexed += len(rows)
+        if indexed:
+            log(f"Index des quasi-doublons: {indexed} offres indexées en {time.perf_counter() - start:.2f}s")
+        return indexed
+
+    def clear(self):
+        """Vider l'index (avant une reconstruction complète)"""
+        with self.engine.begin() as conn:
+            conn.execute(delete(OfferLSHBucket.__table__))
+            conn.execute(delete(OfferSignature.__table__))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index des offres quasi identiques (MinHash/LSH)")
+    parser.add_argument("--db", default="sqlite:///educarriere_jobs.db",
+                        help="URL de connexion à la base de données (défaut: sqlite:///educarriere_jobs.db)")
+    parser.add_argument("--rebuild", action="store_true", help="Reconstruire l'index depuis zéro")
+    args = parser.parse_args()
+
+    engine = get_engine(args.db)
+    create_tables(engine)
+    index = NearDuplicateIndex(engine)
+    if args.rebuild:
+        index.clear()
+    print(f"{index.sync()} offres ajoutées à l'index")
@@ -0,0 +1,103 @@
+from dataclasses import dataclass, fields
+
+from api.dates import parse_date
+
+# Champs d'une offre, dans l'ordre des colonnes CSV (schéma partagé par le scraper et l'importation)
+JOB_FIELDS = (
+    'type', 'title', 'url', 'id', 'code', 'date_edition', 'date_limite',
+    'metier', 'niveau', 'experience', 'lieu', 'date_publication',
+    'entreprise', 'description_poste', 'profil_poste', 'dossier_candidature',
+    'email_candidature', 'description_complete',
+)
+_JOB_FIELD_SET = frozenset(JOB_FIELDS)
+
+# Champs date au format du site (JJ/MM/AAAA), convertis en date pour la base de données
+DATE_FIELDS = ('date_edition', 'date_limite', 'date_publication')
+
+
+def _clean(value):
+    """Valeur d'un champ en chaîne: None et NaN (cellules vides de pandas) deviennent des chaînes vides"""
+    if value is None or value != value:
+        return ""
+    return value if isinstance(value, str) else str(value)
+
+
+@dataclass(slots=True)
+class JobRecord:
+    """Offre d'emploi compacte (__slots__): tous les champs existent toujours, vides par défaut
+
+    L'accès par clé (job['url'], job.get('id'), job.update(details)) reste disponible pour le code qui
+    manipulait des dicts; les conversions en dict, JSON et ligne de base se font aux extrémités.
+    """
+    type: str = ""
+    title: str = ""
+    url: str = ""
+    id: str = ""
+    code: str = ""
+    date_edition: str = ""
+    date_limite: str = ""
+    metier: str = ""
+    niveau: str = ""
+    experience: str = ""
+    lieu: str = ""
+    date_publication: str = ""
+    entreprise: str = ""
+    description_poste: str = ""
+    profil_poste: str = ""
+    dossier_candidature: str = ""
+    email_candidature: str = ""
+    description_complete: str = ""
+
+    def __getitem__(self, field):
+        if field not in _JOB_FIELD_SET:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __setitem__(self, field, value):
+        if field not in _JOB_FIELD_SET:
+            raise KeyError(field)
+        setattr(self, field, value)
+
+    def __contains__(self, field):
+        return field in _JOB_FIELD_SET
+
+    def get(self, field, default=None):
+        return getattr(self, field) if field in _JOB_FIELD_SET else default
+
+    def keys(self):
+        return JOB_FIELDS
+
+    def update(self, values):
+        """Reporter les champs connus d'un dict (par exemple les détails extraits d'une page)"""
+        for field, value in values.items():
+            if field in _JOB_FIELD_SET:
+                setattr(self, field, value)
+
+    def to_dict(self):
+        """Dict ordonné de tous les champs (pour JSON, CSV et NDJSON)"""
+        return {field: getattr(self, field) for field in JOB_FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Construire une offre depuis un dict (JSON, CSV, journal); les clés inconnues sont ignorées"""
+        return cls(*(_clean(data.get(field)) for field in JOB_FIELDS))
+
+    @classmethod
+    def coerce(cls, job):
+        """Retourner job s'il est déjà un JobRecord, sinon le convertir"""
+        return job if isinstance(job, cls) else cls.from_dict(job)
+
+    def to_row(self):
+        """Ligne de la table job_offers (sans date_added), dates converties avec le parseur partagé"""
+        row = {'offer_id': self.id}
+        for field in JOB_FIELDS:
+            if field == 'id':
+                continue
+            if field in DATE_FIELDS:
+                row[field] = parse_date(getattr(self, field))
+            else:
+                row[field] = getattr(self, field)
+        return row
+
+
+assert tuple(field.name for field in fields(JobRecord)) == JOB_FIELDS
@@ -0,0 +1,168 @@
+import datetime
+import glob
+import json
+import os
+import shutil
+import sys
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import Date, Integer, Text, select
+
+# Ajoutez le chemin du dossier api au path pour pouvoir importer les modèles
+sys.path.append(os.path.join(os.path.dirname(__file__), "api"))
+
+# Importer les modèles depuis api/models.py
+from api.models import JobOffer, get_engine
+
+# Nombre de lignes lues par lot depuis la base de données (et taille des groupes de lignes Parquet)
+EXPORT_CHUNK_SIZE = 10000
+
+# Colonnes à faible cardinalité: encodage par dictionnaire
+DICTIONARY_COLUMNS = ['type', 'metier', 'niveau', 'experience', 'lieu', 'entreprise']
+# Colonnes de texte long: compression zstd plus forte
+TEXT_COLUMNS = [column.name for column in JobOffer.__table__.columns if isinstance(column.type, Text)]
+TEXT_ZSTD_LEVEL = 9
+DEFAULT_ZSTD_LEVEL = 3
+
+MANIFEST_NAME = '_manifest.json'
+UNKNOWN_MONTH = 'inconnu'
+
+
+def arrow_schema():
+    """Schéma Parquet dérivé des colonnes du modèle JobOffer"""
+    fields = []
+    for column in JobOffer.__table__.columns:
+        if isinstance(column.type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column.type, Date):
+            arrow_type = pa.date32()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column.name, arrow_type))
+    return pa.schema(fields)
+
+
+def load_manifest(output_dir):
+    """Charger le manifeste des exports précédents (dernier id exporté et contenu des partitions)"""
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {'last_id': 0, 'partitions': {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(output_dir, manifest):
+    """Écrire le manifeste de façon atomique"""
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=4)
+    os.replace(path + '.tmp', path)
+
+
+def partition_month(date_added):
+    """Partition d'une offre: mois de son ajout en base (AAAA-MM)"""
+    return date_added.strftime('%Y-%m') if date_added else UNKNOWN_MONTH
+
+
+def export_to_parquet(engine, output_dir, full=False):
+    """Exporter la table job_offers en fichiers Parquet partitionnés par mois de date_added
+
+    En mode incrémental, seules les offres d'id supérieur au dernier id exporté sont écrites, dans un
+    nouveau fichier de chaque partition concernée; les fichiers existants ne sont jamais réécrits.
+    full reconstruit l'export complet (à utiliser après des mises à jour d'offres existantes).
+    """
+    start = time.perf_counter()
+    if full:
+        # Seuls les fichiers produits par l'export sont supprimés: le dossier peut contenir d'autres données
+        for partition_dir in glob.glob(os.path.join(output_dir, 'date_added_month=*')):
+            shutil.rmtree(partition_dir)
+        if os.path.exists(os.path.join(output_dir, MANIFEST_NAME)):
+            os.remove(os.path.join(output_dir, MANIFEST_NAME))
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = load_manifest(output_dir)
+    last_id = manifest['last_id']
+    print(f"Exportation Parquet vers {output_dir} (offres d'id > {last_id})...")
+
+    schema = arrow_schema()
+    table = JobOffer.__table__
+    columns = schema.names
+    writer_options = {
+        'compression': 'zstd',
+        'compression_level': {name: TEXT_ZSTD_LEVEL if name in TEXT_COLUMNS else DEFAULT_ZSTD_LEVEL
+                              for name in columns},
+        'use_dictionary': DICTIONARY_COLUMNS,
+    }
+
+    writers = {}  # mois -> (ParquetWriter, chemin temporaire, chemin final)
+    counts = {}
+    max_id = last_id
+    try:
+        with engine.connect() as conn:
+            result = (conn.execution_options(yield_per=EXPORT_CHUNK_SIZE)
+                      .execute(select(table).where(table.c.id > last_id).order_by(table.c.id)))
+            for rows in result.partitions():
+                # Regrouper le lot par partition, colonne par colonne
+                by_month = {}
+                for row in rows:
+                    month_columns = by_month.setdefault(partition_month(row.date_added), {name: [] for name in columns})
+                    for name in columns:
+                        month_columns[name].append(row._mapping[name])
+                    max_id = max(max_id, row.id)
+
+                for month, month_columns in by_month.items():
+                    if month not in writers:
+                        partition_dir = os.path.join(output_dir, f'date_added_month={month}')
+                        os.makedirs(partition_dir, exist_ok=True)
+                        path = os.path.join(partition_dir, f'part-{last_id + 1:09d}.parquet')
+                        writers[month] = (pq.ParquetWriter(path + '.tmp', schema, **writer_options), path)
+                    writers[month][0].write_table(pa.Table.from_pydict(month_columns, schema=schema),
+                                                  row_group_size=EXPORT_CHUNK_SIZE)
+                    counts[month] = counts.get(month, 0) + len(month_columns['id'])
+    except Exception:
+        # Ne laisser aucun fichier partiel: le prochain export reprendra au même id
+        for writer, path in writers.values():
+            writer.close()
+            os.remove(path + '.tmp')
+        raise
+
+    for month, (writer, path) in writers.items():
+        writer.close()
+        os.replace(path + '.tmp', path)
+        partition = manifest['partitions'].setdefault(month, {'rows': 0, 'files': []})
+        partition['rows'] += counts[month]
+        partition['files'].append(os.path.basename(path))
+
+    # Le manifeste est écrit en dernier: un export interrompu n'avance pas le dernier id exporté
+    manifest['last_id'] = max_id
+    manifest['exported_at'] = datetime.datetime.now().isoformat(timespec='seconds')
+    save_manifest(output_dir, manifest)
+
+    exported = sum(counts.values())
+    elapsed = time.perf_counter() - start
+    size = sum(os.path.getsize(os.path.join(root, name))
+               for root, _, files in os.walk(output_dir) for name in files if name.endswith('.parquet'))
+    print(f"Exportation terminée en {elapsed:.2f}s: {exported} offres dans {len(counts)} partitions "
+          f"({', '.join(sorted(counts)) or 'aucune'}), taille totale de l'export: {size / 1024 / 1024:.1f} Mo")
+    return exported
+
+
+if __name__ == "__main__":
+    import argparse
+
+    # Configurer le parseur d'arguments
+    parser = argparse.ArgumentParser(
+        description="Exporter les offres de la base de données SQL en fichiers Parquet partitionnés par mois")
+    parser.add_argument("--db", default="sqlite:///educarriere_jobs.db",
+                        help="URL de connexion à la base de données (défaut: sqlite:///educarriere_jobs.db)")
+    parser.add_argument("--output", default="educarriere_data/parquet",
+                        help="Dossier de l'export Parquet (défaut: educarriere_data/parquet)")
+    parser.add_argument("--full", action="store_true",
+                        help="Reconstruire tout l'export au lieu d'ajouter les nouvelles offres")
+
+    # Analyser les arguments
+    args = parser.parse_args()
+
+    # Exporter les données
+    export_to_parquet(get_engine(args.db), args.output, full=args.full)
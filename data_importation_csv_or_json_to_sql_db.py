@@ -1,231 +1,316 @@
-import json
 import csv
 import datetime
+import glob
+import itertools
+import multiprocessing
 import pandas as pd
 import os
+import queue
 import sys
-from dateutil import parser
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import time
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import create_engine, insert, select
 
 # Ajoutez le chemin du dossier api au path pour pouvoir importer les modèles
 sys.path.append(os.path.join(os.path.dirname(__file__), "api"))
 
 # Importer les modèles depuis api/models.py
 from api.models import Base, JobOffer, get_engine, create_tables
-
-# Ajouter au début de votre script d'importation, avant l'importation
-'''def clear_database(engine):
-    Session = sessionmaker(bind=engine)
-    session = Session()
-    try:
-        # Supprimer toutes les offres d'emploi
-        session.query(JobOffer).delete()
-        session.commit()
-        print("Base de données vidée avec succès.")
-    except Exception as e:
-        session.rollback()
-        print(f"Erreur lors du vidage de la base de données: {str(e)}")
-    finally:
-        session.close()'''
-
-'''def parse_date(date_str):
-    """Convertit une chaîne de date en objet date"""
-    if not date_str or date_str == "":
+from api.records import DATE_FIELDS, JOB_FIELDS, JobRecord
+from api.dates import parse_date_column, date_failures, describe_date_failures, reset_date_failures
+from api.fingerprints import stable_offer_id
+from api.near_duplicates import NearDuplicateIndex
+from scraper.ndjson_sink import iter_json_array, iter_ndjson
+from scraper.offer_store import fragment_order
+
+# Nombre d'IDs par requête de vérification des offres existantes
+EXISTING_IDS_CHUNK_SIZE = 500
+# Nombre d'offres lues avant chaque écriture en base: la mémoire utilisée ne dépend que de ce lot
+IMPORT_BATCH_SIZE = 1000
+
+# Fichiers pris en compte par l'importation d'un dossier, et lots d'avance qu'un fichier peut lire avant l'écriture
+IMPORT_PATTERNS = ('*.json', '*.ndjson', '*.csv')
+FILE_QUEUE_BATCHES = 4
+
+
+def existing_offer_ids(engine, offer_ids):
+    """IDs déjà présents dans la table job_offers parmi ceux demandés (une requête par lot d'IDs)"""
+    table = JobOffer.__table__
+    offer_ids = list(offer_ids)
+    existing = set()
+    with engine.connect() as conn:
+        for i in range(0, len(offer_ids), EXISTING_IDS_CHUNK_SIZE):
+            chunk = offer_ids[i:i + EXISTING_IDS_CHUNK_SIZE]
+            existing.update(conn.execute(select(table.c.offer_id).where(table.c.offer_id.in_(chunk))).scalars())
+    return existing
+
+
+def generated_offer_id(title, entreprise):
+    """ID généré à partir du titre et de l'entreprise, pour une offre sans ID dans le fichier
+
+    L'ID est stable d'une exécution à l'autre: réimporter la même offre ne crée pas de nouvelle ligne.
+    """
+    print(f"Offre sans ID trouvée: {title or 'Sans titre'}. Génération d'un ID unique.")
+    return stable_offer_id(title, entreprise)
+
+
+def offer_id_for(record, job_data):
+    """ID de l'offre, ou ID généré à partir du titre et de l'entreprise si le fichier n'en fournit pas"""
+    offer_id = record.id or str(job_data.get('offer_id') or '')
+    if not offer_id or offer_id == 'nan':
+        offer_id = generated_offer_id(record.title, record.entreprise)
+    return offer_id
+
+
+def open_near_duplicate_index(engine, enabled=True):
+    """Index des quasi-doublons à jour des offres déjà en base, ou None si la détection est désactivée"""
+    if not enabled:
         return None
-    try:
-        return parser.parse(date_str).date()
-    except:
-        return None'''
+    index = NearDuplicateIndex(engine)
+    index.sync()
+    return index
+
+
+def insert_new_offers(engine, rows, index=None):
+    """Insérer en un INSERT groupé les lignes dont l'offer_id n'est pas encore en base
+
+    Les offres existantes sont recherchées en une requête par lot d'IDs au lieu d'une par ligne, et un
+    ID répété dans le lot n'est importé qu'une fois (première occurrence). Avec un index de quasi-doublons,
+    les republications d'une offre déjà en base sous un autre ID sont écartées, et les signatures des
+    offres insérées sont enregistrées dans la même transaction.
+    Retourne (importées, ignorées, quasi-doublons).
+    """
+    existing = existing_offer_ids(engine, {row['offer_id'] for row in rows})
+    new_rows = []
+    for row in rows:
+        if row['offer_id'] not in existing:
+            existing.add(row['offer_id'])
+            new_rows.append(row)
+    skipped = len(rows) - len(new_rows)
+
+    near_duplicates = []
+    entries = []
+    if index is not None and new_rows:
+        new_rows, entries, near_duplicates = index.filter(new_rows)
+    if new_rows:
+        with engine.begin() as conn:
+            conn.execute(insert(JobOffer.__table__), new_rows)
+            if index is not None:
+                index.save(conn, entries)
+    return len(new_rows), skipped, len(near_duplicates)
+
+
+def import_rows(engine, rows, start, batch_size=IMPORT_BATCH_SIZE, index=None):
+    """Écrire un flux de lignes en base par lots de batch_size, puis afficher le bilan de l'importation
+
+    Les lots déjà écrits font foi pour les suivants: un ID répété plus loin dans le fichier est ignoré.
+    """
+    rows = iter(rows)
+    total = imported_count = skipped_count = near_count = 0
+    while batch := list(itertools.islice(rows, batch_size)):
+        imported, skipped, near_duplicates = insert_new_offers(engine, batch, index)
+        total += len(batch)
+        imported_count += imported
+        skipped_count += skipped
+        near_count += near_duplicates
+        print(f"  {total} offres lues, {imported_count} importées...")
+
+    elapsed = time.perf_counter() - start
+    print(f"Importation terminée en {elapsed:.2f}s: {imported_count} offres importées, {skipped_count} offres "
+          f"ignorées (déjà existantes), {near_count} quasi-doublons écartés "
+          f"({total / elapsed if elapsed else 0:.0f} lignes/s)")
+    date_failures = describe_date_failures()
+    if date_failures:
+        print(f"Attention: {date_failures}")
+    return imported_count, skipped_count
+
+
+def json_rows(json_file, date_added):
+    """Lignes de la table job_offers d'un fichier JSON (tableau) ou NDJSON, lues en flux"""
+    # Lire les offres une à une, sans charger le fichier entier
+    if json_file.lower().endswith('.ndjson'):
+        jobs_data = iter_ndjson(json_file)
+    else:
+        jobs_data = iter_json_array(json_file)
 
-def parse_date(date_str):
-    if not date_str or date_str == "":
-        return None
-    try:
-        return datetime.datetime.strptime(date_str, "%d/%m/%Y").date()
-    except Exception as e:
-        print(f"Erreur lors de la conversion de la date '{date_str}': {str(e)}")
-        return None
+    # Construire les lignes depuis les offres compactes (dates converties, champs vides par défaut)
+    for job_data in jobs_data:
+        record = JobRecord.from_dict(job_data)
+        yield {**record.to_row(), 'offer_id': offer_id_for(record, job_data), 'date_added': date_added}
 
-def import_from_json(json_file, engine):
-    """Importe les données depuis un fichier JSON"""
-    print(f"Importation depuis {json_file}...")
 
-    # Créer une session
-    Session = sessionmaker(bind=engine)
-    session = Session()
+def import_from_json(json_file, engine, batch_size=IMPORT_BATCH_SIZE, near_duplicates=True):
+    """Importe les données depuis un fichier JSON (tableau) ou NDJSON, lu en flux par lots"""
+    print(f"Importation depuis {json_file}...")
+    start = time.perf_counter()
+    reset_date_failures()
 
     try:
-        # Charger les données JSON
-        with open(json_file, 'r', encoding='utf-8') as f:
-            jobs_data = json.load(f)
-
-        # Compter le nombre d'offres à importer
-        print(f"Fichier chargé. {len(jobs_data)} offres trouvées.")
-
-        # Garder une trace des offres importées et ignorées
-        imported_count = 0
-        skipped_count = 0
-
-        # Traiter chaque offre
-        for job_data in jobs_data:
-            # Vérifier si l'offre existe déjà par son offer_id
-            offer_id = job_data.get('id') or job_data.get('offer_id')
-
-            if not offer_id:
-                print(f"Offre sans ID trouvée: {job_data.get('title', 'Sans titre')}. Génération d'un ID unique.")
-                # Générer un ID basé sur le titre et l'entreprise
-                title = job_data.get('title', '')
-                entreprise = job_data.get('entreprise', '')
-                offer_id = f"gen_{hash(title + entreprise) % 10000000}"
-
-            existing = session.query(JobOffer).filter_by(offer_id=offer_id).first()
-
-            if existing:
-                skipped_count += 1
-                continue
-
-            # Préparer les dates
-            date_edition = parse_date(job_data.get('date_edition'))
-            date_limite = parse_date(job_data.get('date_limite'))
-            date_publication = parse_date(job_data.get('date_publication'))
-
-            # Créer l'objet JobOffer
-            job_offer = JobOffer(
-                offer_id=offer_id,
-                type=job_data.get('type', ''),
-                title=job_data.get('title', ''),
-                url=job_data.get('url', ''),
-                code=job_data.get('code', ''),
-                date_edition=date_edition,
-                date_limite=date_limite,
-                metier=job_data.get('metier', ''),
-                niveau=job_data.get('niveau', ''),
-                experience=job_data.get('experience', ''),
-                lieu=job_data.get('lieu', ''),
-                date_publication=date_publication,
-                entreprise=job_data.get('entreprise', ''),
-                description_poste=job_data.get('description_poste', ''),
-                profil_poste=job_data.get('profil_poste', ''),
-                dossier_candidature=job_data.get('dossier_candidature', ''),
-                email_candidature=job_data.get('email_candidature', ''),
-                description_complete=job_data.get('description_complete', ''),
-                date_added=datetime.datetime.now().date()
-            )
-
-            # Ajouter l'offre à la session
-            session.add(job_offer)
-            imported_count += 1
-
-            # Valider les changements tous les 100 éléments
-            if imported_count % 100 == 0:
-                session.commit()
-                print(f"  {imported_count} offres importées...")
-
-        # Valider les derniers changements
-        session.commit()
-        print(
-            f"Importation terminée: {imported_count} offres importées, {skipped_count} offres ignorées (déjà existantes)")
+        index = open_near_duplicate_index(engine, near_duplicates)
+        date_added = datetime.datetime.now().date()
+        return import_rows(engine, json_rows(json_file, date_added), start, batch_size, index)
 
     except Exception as e:
-        session.rollback()
         print(f"Erreur lors de l'importation: {str(e)}")
-    finally:
-        session.close()
 
 
-def import_from_csv(csv_file, engine):
-    """Importe les données depuis un fichier CSV"""
-    print(f"Importation depuis {csv_file}...")
+def csv_chunk_rows(chunk, date_added):
+    """Lignes de la table job_offers pour un bloc du CSV, préparées colonne par colonne
+
+    Le bloc est lu en chaînes Python sans conversion des cellules vides (dtype=object, keep_default_na=False):
+    seules les dates demandent une conversion, faite par colonne avec le parseur partagé.
+    """
+    chunk = chunk.reindex(columns=[*JOB_FIELDS, 'offer_id'], fill_value='')
+    offer_ids = chunk['id'].where(chunk['id'] != '', chunk['offer_id'])
+    # Les offres sans ID sont rares: seules celles-ci passent par une boucle Python
+    for index in offer_ids.index[offer_ids == '']:
+        offer_ids[index] = generated_offer_id(chunk.at[index, 'title'], chunk.at[index, 'entreprise'])
 
-    # Créer une session
-    Session = sessionmaker(bind=engine)
-    session = Session()
+    columns = {'offer_id': offer_ids}
+    for field in JOB_FIELDS:
+        if field in DATE_FIELDS:
+            columns[field] = parse_date_column(chunk[field])
+        elif field != 'id':
+            columns[field] = chunk[field]
+    rows = pd.DataFrame(columns)
+    rows['date_added'] = date_added
+    return rows.to_dict('records')
+
+
+def csv_rows(csv_file, date_added, batch_size=IMPORT_BATCH_SIZE):
+    """Lignes de la table job_offers d'un fichier CSV, lu et converti par blocs de batch_size lignes"""
+    chunks = pd.read_csv(csv_file, encoding='utf-8-sig', dtype=object, keep_default_na=False, chunksize=batch_size)
+    for chunk in chunks:
+        yield from csv_chunk_rows(chunk, date_added)
+
+
+def import_from_csv(csv_file, engine, batch_size=IMPORT_BATCH_SIZE, near_duplicates=True):
+    """Importe les données depuis un fichier CSV, lu et converti par blocs de batch_size lignes"""
+    print(f"Importation depuis {csv_file}...")
+    start = time.perf_counter()
+    reset_date_failures()
 
     try:
-        # Charger les données CSV avec Pandas
-        df = pd.read_csv(csv_file, encoding='utf-8-sig')
-
-        # Compter le nombre d'offres à importer
-        print(f"Fichier chargé. {len(df)} offres trouvées.")
-
-        # Garder une trace des offres importées et ignorées
-        imported_count = 0
-        skipped_count = 0
-
-        # Traiter chaque offre
-        for _, row in df.iterrows():
-            # Convertir la ligne en dictionnaire
-            job_data = row.to_dict()
-
-            # Vérifier si l'offre existe déjà par son offer_id
-            offer_id = str(job_data.get('id') or job_data.get('offer_id') or '')
-
-            if not offer_id or offer_id == 'nan':
-                print(f"Offre sans ID trouvée: {job_data.get('title', 'Sans titre')}. Génération d'un ID unique.")
-                # Générer un ID basé sur le titre et l'entreprise
-                title = str(job_data.get('title', ''))
-                entreprise = str(job_data.get('entreprise', ''))
-                offer_id = f"gen_{hash(title + entreprise) % 10000000}"
-
-            existing = session.query(JobOffer).filter_by(offer_id=offer_id).first()
-
-            if existing:
-                skipped_count += 1
-                continue
-
-            # Préparer les dates
-            date_edition = parse_date(job_data.get('date_edition'))
-            date_limite = parse_date(job_data.get('date_limite'))
-            date_publication = parse_date(job_data.get('date_publication'))
-
-            # Nettoyer les valeurs NaN
-            for key, value in job_data.items():
-                if pd.isna(value):
-                    job_data[key] = ""
-
-            # Créer l'objet JobOffer
-            job_offer = JobOffer(
-                offer_id=offer_id,
-                type=job_data.get('type', ''),
-                title=job_data.get('title', ''),
-                url=job_data.get('url', ''),
-                code=job_data.get('code', ''),
-                date_edition=date_edition,
-                date_limite=date_limite,
-                metier=job_data.get('metier', ''),
-                niveau=job_data.get('niveau', ''),
-                experience=job_data.get('experience', ''),
-                lieu=job_data.get('lieu', ''),
-                date_publication=date_publication,
-                entreprise=job_data.get('entreprise', ''),
-                description_poste=job_data.get('description_poste', ''),
-                profil_poste=job_data.get('profil_poste', ''),
-                dossier_candidature=job_data.get('dossier_candidature', ''),
-                email_candidature=job_data.get('email_candidature', ''),
-                description_complete=job_data.get('description_complete', ''),
-                date_added=datetime.datetime.now().date()
-            )
-
-            # Ajouter l'offre à la session
-            session.add(job_offer)
-            imported_count += 1
-
-            # Valider les changements tous les 100 éléments
-            if imported_count % 100 == 0:
-                session.commit()
-                print(f"  {imported_count} offres importées...")
-
-        # Valider les derniers changements
-        session.commit()
-        print(
-            f"Importation terminée: {imported_count} offres importées, {skipped_count} offres ignorées (déjà existantes)")
+        index = open_near_duplicate_index(engine, near_duplicates)
+        date_added = datetime.datetime.now().date()
+        return import_rows(engine, csv_rows(csv_file, date_added, batch_size), start, batch_size, index)
 
     except Exception as e:
-        session.rollback()
         print(f"Erreur lors de l'importation: {str(e)}")
-    finally:
-        session.close()
+
+
+def file_rows(path, date_added, batch_size=IMPORT_BATCH_SIZE):
+    """Lignes d'un fichier à importer, selon son extension (JSON, NDJSON ou CSV)"""
+    if path.lower().endswith(('.json', '.ndjson')):
+        return json_rows(path, date_added)
+    if path.lower().endswith('.csv'):
+        return csv_rows(path, date_added, batch_size)
+    raise ValueError(f"Format de fichier non supporté: {path}")
+
+
+def parse_file(path, date_added, batch_size, output):
+    """Lire et normaliser un fichier dans un processus du pool, et envoyer ses lignes par lots au processus d'écriture
+
+    Le dernier message est le bilan du fichier (dict): lignes lues, durée, dates illisibles, erreur éventuelle.
+    La file est bornée: un processus qui lit plus vite que la base n'écrit attend au lieu d'accumuler.
+    """
+    start = time.perf_counter()
+    reset_date_failures()
+    summary = {'rows': 0, 'error': None}
+    try:
+        rows = iter(file_rows(path, date_added, batch_size))
+        while batch := list(itertools.islice(rows, batch_size)):
+            output.put(batch)
+            summary['rows'] += len(batch)
+    except Exception as e:
+        summary['error'] = str(e)
+    summary['seconds'] = time.perf_counter() - start
+    summary['date_failures'] = sum(date_failures().values())
+    output.put(summary)
+
+
+def next_message(output, future):
+    """Message suivant d'un fichier en cours de lecture; erreur si le processus s'est arrêté sans bilan"""
+    while True:
+        try:
+            return output.get(timeout=1)
+        except queue.Empty:
+            if future.done() and output.empty():
+                future.result()
+                raise RuntimeError("le processus de lecture s'est arrêté sans envoyer de bilan")
+
+
+def import_directory(directory, engine, patterns=IMPORT_PATTERNS, workers=None, batch_size=IMPORT_BATCH_SIZE,
+                     near_duplicates=True):
+    """Importer tous les fichiers d'un dossier: lecture en parallèle, écriture par ce seul processus
+
+    Un pool de processus lit et normalise les fichiers; chaque fichier envoie ses lots dans sa propre file
+    bornée, que le processus principal vide dans l'ordre des fichiers, seul à écrire dans la base (SQLite
+    n'accepte qu'un écrivain à la fois). Les fichiers sont pris du plus récent au plus ancien: une offre
+    présente dans plusieurs fichiers est importée depuis la sauvegarde la plus récente, et ses autres
+    copies sont écartées avant toute requête.
+    """
+    start = time.perf_counter()
+    reset_date_failures()
+    paths = sorted({path for pattern in patterns for path in glob.glob(os.path.join(directory, pattern))},
+                   key=fragment_order, reverse=True)
+    if not paths:
+        print(f"Aucun fichier à importer dans {directory}")
+        return 0, 0
+    print(f"Importation de {len(paths)} fichiers depuis {directory}...")
+
+    index = open_near_duplicate_index(engine, near_duplicates)
+    date_added = datetime.datetime.now().date()
+    seen = set()
+    total = imported_count = skipped_count = duplicate_count = near_count = failure_count = 0
+    manager = multiprocessing.Manager()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Les fichiers sont soumis dans l'ordre de lecture: celui attendu par l'écriture est toujours en cours
+        outputs = [manager.Queue(maxsize=FILE_QUEUE_BATCHES) for _ in paths]
+        futures = [executor.submit(parse_file, path, date_added, batch_size, output)
+                   for path, output in zip(paths, outputs)]
+        for path, output, future in zip(paths, outputs, futures):
+            file_start = time.perf_counter()
+            imported = skipped = duplicates = near = 0
+            try:
+                while isinstance(message := next_message(output, future), list):
+                    # Doublons écartés avant écriture: offre déjà lue dans un fichier plus récent ou plus haut
+                    batch = []
+                    for row in message:
+                        if row['offer_id'] in seen:
+                            duplicates += 1
+                        else:
+                            seen.add(row['offer_id'])
+                            batch.append(row)
+                    batch_imported, batch_skipped, batch_near = insert_new_offers(engine, batch, index)
+                    imported += batch_imported
+                    skipped += batch_skipped
+                    near += batch_near
+                summary = message
+            except Exception as e:
+                summary = {'rows': imported + skipped + duplicates + near, 'seconds': 0, 'date_failures': 0, 'error': str(e)}
+
+            total += summary['rows']
+            imported_count += imported
+            skipped_count += skipped
+            duplicate_count += duplicates
+            near_count += near
+            failure_count += summary['date_failures']
+            elapsed = time.perf_counter() - file_start
+            print(f"  {os.path.basename(path)}: {summary['rows']} lignes lues en {summary['seconds']:.2f}s "
+                  f"({summary['rows'] / summary['seconds'] if summary['seconds'] else 0:.0f} lignes/s), "
+                  f"{imported} importées, {skipped} déjà en base, {duplicates} doublons déjà lus, {near} quasi-doublons"
+                  + (f", {summary['date_failures']} dates illisibles" if summary['date_failures'] else "")
+                  + (f" - Erreur: {summary['error']}" if summary['error'] else "")
+                  + f" (écriture {elapsed:.2f}s)")
+    manager.shutdown()
+
+    elapsed = time.perf_counter() - start
+    print(f"Importation terminée en {elapsed:.2f}s: {len(paths)} fichiers, {total} lignes lues, "
+          f"{imported_count} offres importées, {skipped_count} ignorées (déjà existantes), "
+          f"{duplicate_count} doublons entre fichiers, {near_count} quasi-doublons écartés ({total / elapsed if elapsed else 0:.0f} lignes/s)"
+          + (f"; attention: {failure_count} dates illisibles" if failure_count else ""))
+    return imported_count, skipped_count
 
 
 if __name__ == "__main__":
@@ -234,7 +319,17 @@ if __name__ == "__main__":
     # Configurer le parseur d'arguments
     parser = argparse.ArgumentParser(
         description="Importer des données dans la base de données SQL depuis des fichiers JSON ou CSV")
-    parser.add_argument("--file", required=True, help="Chemin vers le fichier JSON ou CSV à importer")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--file", help="Chemin vers le fichier JSON, NDJSON ou CSV à importer")
+    source.add_argument("--dir", help="Dossier de fichiers JSON, NDJSON ou CSV à importer en parallèle")
+    parser.add_argument("--pattern", action="append", default=None,
+                        help="Motif des fichiers du dossier, répétable (défaut: *.json, *.ndjson et *.csv)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processus de lecture pour --dir (défaut: nombre de cœurs)")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE,
+                        help=f"Nombre d'offres lues par écriture en base (défaut: {IMPORT_BATCH_SIZE})")
+    parser.add_argument("--keep-near-duplicates", action="store_true",
+                        help="Importer aussi les republications quasi identiques d'offres déjà en base")
     parser.add_argument("--db", default="sqlite:///educarriere_jobs.db",
                         help="URL de connexion à la base de données (défaut: sqlite:///educarriere_jobs.db)")
 
@@ -250,10 +345,13 @@ if __name__ == "__main__":
     create_tables(engine)
 
     # Importer les données
-    if args.file.lower().endswith('.json'):
-        import_from_json(args.file, engine)
+    if args.dir:
+        import_directory(args.dir, engine, patterns=args.pattern or IMPORT_PATTERNS, workers=args.workers,
+                         batch_size=args.batch_size, near_duplicates=not args.keep_near_duplicates)
+    elif args.file.lower().endswith(('.json', '.ndjson')):
+        import_from_json(args.file, engine, args.batch_size, not args.keep_near_duplicates)
     elif args.file.lower().endswith('.csv'):
-        import_from_csv(args.file, engine)
+        import_from_csv(args.file, engine, args.batch_size, not args.keep_near_duplicates)
     else:
         print(f"Format de fichier non supporté: {args.file}")
-        print("Seuls les fichiers JSON et CSV sont supportés.")
\ No newline at end of file
+        print("Seuls les fichiers JSON, NDJSON et CSV sont supportés.")
\ No newline at end of file
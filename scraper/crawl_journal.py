@@ -0,0 +1,115 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+
+class CrawlJournal:
+    """Journal persistant (SQLite) de l'avancement d'un crawl, pour reprendre après un arrêt brutal
+
+    Chaque page de listing est 'queued' puis 'fetched'; chaque offre passe par 'queued' (trouvée sur
+    une page de listing), 'fetched' (détails récupérés) puis 'persisted' (écrite en base de données).
+    """
+
+    QUEUED = 'queued'
+    FETCHED = 'fetched'
+    PERSISTED = 'persisted'
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # WAL: chaque transition est durable sans bloquer les lectures
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                page INTEGER PRIMARY KEY,
+                state TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS offers (
+                url TEXT PRIMARY KEY,
+                offer_id TEXT,
+                page INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                state TEXT NOT NULL,
+                job TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_offers_page ON offers (page, position);
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def _now():
+        return datetime.now().isoformat(timespec='seconds')
+
+    def _execute(self, sql, params=(), many=False):
+        with self._lock:
+            if many:
+                self._conn.executemany(sql, params)
+            else:
+                self._conn.execute(sql, params)
+            self._conn.commit()
+
+    def reset(self):
+        """Vider le journal au début d'un nouveau crawl"""
+        with self._lock:
+            self._conn.execute('DELETE FROM offers')
+            self._conn.execute('DELETE FROM pages')
+            self._conn.commit()
+
+    def page_state(self, page):
+        with self._lock:
+            row = self._conn.execute('SELECT state FROM pages WHERE page = ?', (page,)).fetchone()
+        return row[0] if row else None
+
+    def mark_page_queued(self, page):
+        self._execute('INSERT OR IGNORE INTO pages (page, state, updated_at) VALUES (?, ?, ?)',
+                      (page, self.QUEUED, self._now()))
+
+    def mark_page_fetched(self, page, jobs):
+        """Enregistrer une page de listing récupérée et ses nouvelles offres [(position, job)] en une transaction"""
+        now = self._now()
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO offers (url, offer_id, page, position, state, job, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(job['url'], job.get('id', ''), page, position, self.QUEUED, json.dumps(dict(job), ensure_ascii=False), now)
+                 for position, job in jobs]
+            )
+            self._conn.execute('INSERT OR REPLACE INTO pages (page, state, updated_at) VALUES (?, ?, ?)',
+                               (page, self.FETCHED, now))
+            self._conn.commit()
+
+    def mark_offer_fetched(self, job):
+        """Enregistrer les détails récupérés d'une offre"""
+        self._execute('UPDATE offers SET state = ?, job = ?, updated_at = ? WHERE url = ? AND state = ?',
+                      (self.FETCHED, json.dumps(dict(job), ensure_ascii=False), self._now(), job['url'], self.QUEUED))
+
+    def mark_persisted(self, urls):
+        """Marquer des offres comme écrites en base de données (seules les offres aux détails récupérés)"""
+        now = self._now()
+        self._execute('UPDATE offers SET state = ?, updated_at = ? WHERE url = ? AND state = ?',
+                      [(self.PERSISTED, now, url, self.FETCHED) for url in urls], many=True)
+
+    def page_offers(self, page):
+        """Offres journalisées d'une page: liste de (position, job, état) dans l'ordre de la page"""
+        with self._lock:
+            rows = self._conn.execute('SELECT position, job, state FROM offers WHERE page = ? ORDER BY position',
+                                      (page,)).fetchall()
+        return [(position, json.loads(job), state) for position, job, state in rows]
+
+    def summary(self):
+        """Nombre d'offres par état, pour les logs"""
+        with self._lock:
+            rows = self._conn.execute('SELECT state, COUNT(*) FROM offers GROUP BY state').fetchall()
+            pages = self._conn.execute('SELECT COUNT(*) FROM pages WHERE state = ?', (self.FETCHED,)).fetchone()[0]
+        counts = dict(rows)
+        return (f"{pages} pages listées, {counts.get(self.QUEUED, 0)} offres en attente, "
+                f"{counts.get(self.FETCHED, 0)} récupérées, {counts.get(self.PERSISTED, 0)} en base")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,14 +1,15 @@
-import requests
-from bs4 import BeautifulSoup
+import argparse
 import json
-import pandas as pd
 import time
-import re
-import random
 import os
 import sys
-from datetime import datetime
-from sqlalchemy import create_engine, Column, Integer, String, Text, Date, MetaData, Table
+import threading
+import queue
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, Column, Integer, String, Text, Date, MetaData, Table, select
 #from sqlalchemy.ext.declarative import declarative_base #Importation deprecié
 from sqlalchemy.orm import declarative_base   # Nouvelle façon recommandée
 from sqlalchemy.orm import sessionmaker
@@ -19,9 +20,23 @@ load_dotenv()
 
 # Ajouter le chemin du dossier api au path pour pouvoir importer les modèles
 sys.path.append(os.path.join(os.path.dirname(__file__), "..", "api"))
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
 # Importer les modèles depuis api/models.py
 from api.models import Base, JobOffer, get_engine, get_session_maker, create_tables
+from api.models import OfferFingerprint
+from api.records import JobRecord
+from api.dates import describe_date_failures
+from api.bulk_upsert import upsert_job_offers
+from api.fingerprints import offer_fingerprint, save_fingerprints
+from scraper.rate_limiter import AdaptiveRateLimiter
+from scraper.http_client import ScraperAPIClient, InvalidPageError
+from scraper.http_cache import ResponseCache
+from scraper.html_archive import HTMLArchive
+from scraper.run_logger import RunLogger
+from scraper.ndjson_sink import NDJSONSink
+from scraper.crawl_journal import CrawlJournal
+from scraper.extraction import ALL_FIELDS, parse_listing, parse_detail, get_backend
 
 # Configuration SQLAlchemy
 DATABASE_URL = "sqlite:///educarriere_jobs.db"
@@ -31,19 +46,26 @@ Session = get_session_maker(engine)
 create_tables(engine)
 
 class EducarriereScraper:
-    def __init__(self, api_key, output_dir='educarriere_data'):
+    # Rafraîchissement: intervalle minimal entre deux vérifications d'une offre selon l'ancienneté de sa
+    # publication (en jours), les offres récentes étant revérifiées plus souvent
+    REFRESH_SCHEDULE = [(7, timedelta(days=1)), (30, timedelta(days=3))]
+    REFRESH_DEFAULT_INTERVAL = timedelta(days=7)
+    # Âge maximal (en secondes) d'une page de détail reprise du cache lors d'un rafraîchissement
+    REFRESH_CACHE_MAX_AGE = 6 * 3600
+
+    def __init__(self, api_key, output_dir='educarriere_data', max_workers=4, max_per_host=2, rate_limiter=None,
+                 transport=None, connect_timeout=10, read_timeout=90, use_cache=True, bypass_cache=False,
+                 parser_backend=None, incremental=False, progress_formats=('csv', 'json'), resume=False,
+                 archive_pages=True):
         self.api_key = api_key
         self.base_url = 'https://emploi.educarriere.ci'
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         # Définir tous les champs possibles pour s'assurer qu'ils sont inclus dans le CSV
-        self.all_possible_fields = [
-            'type', 'title', 'url', 'id', 'code', 'date_edition', 'date_limite',
-            'metier', 'niveau', 'experience', 'lieu', 'date_publication',
-            'entreprise', 'description_poste', 'profil_poste', 'dossier_candidature',
-            'email_candidature', 'description_complete'
-        ]
+        self.all_possible_fields = list(ALL_FIELDS)
+        # Backend d'analyse HTML ('html.parser', 'lxml' ou 'fast')
+        self.parser_backend = get_backend(parser_backend).name
         # Créer le dossier de sortie
         self.output_dir = output_dir
         os.makedirs(self.output_dir, exist_ok=True)
@@ -55,21 +77,68 @@ class EducarriereScraper:
         os.makedirs(self.logs_dir, exist_ok=True)
         # Horodatage pour identifier cette session de scraping
         self.session_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        # Fichier de log pour cette session
-        self.log_file = os.path.join(self.logs_dir, f'scraping_log_{self.session_timestamp}.txt')
+        # Sauvegarde progressive: un fichier NDJSON par session, converti à la fin dans ces formats
+        self.progress_file = os.path.join(self.progress_dir, f'educarriere_new_{self.session_timestamp}.ndjson')
+        self.progress_formats = tuple(progress_formats or ())
+        # Fichier de log pour cette session (un événement JSON par ligne, écrit en arrière-plan)
+        self.log_file = os.path.join(self.logs_dir, f'scraping_log_{self.session_timestamp}.jsonl')
+        self.logger = RunLogger(self.log_file)
+        atexit.register(self.logger.close)
+        # Récupération concurrente des détails: nombre de workers et plafond de requêtes simultanées par hôte
+        self.max_workers = max(1, max_workers)
+        self.max_per_host = max(1, max_per_host)
+        self._host_slots = {}
+        self._host_slots_lock = threading.Lock()
+        # Limiteur de débit partagé par toutes les requêtes (remplace les pauses aléatoires fixes)
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter(log=self.log)
+        # Cache disque des pages déjà récupérées (évite de repayer les crédits ScraperAPI lors des relances)
+        self.cache = ResponseCache(os.path.join(self.output_dir, 'cache'), bypass=bypass_cache) if use_cache else None
+        # Archive compressée des pages récupérées, pour réextraire les offres sans refaire de requêtes
+        self.archive = HTMLArchive(os.path.join(self.output_dir, 'archive')) if archive_pages else None
+        # Client HTTP unique (pool keep-alive, timeouts, relances), dimensionné pour les workers de détails
+        self.client = ScraperAPIClient(self.api_key, self.rate_limiter, log=self.log, transport=transport,
+                                       pool_size=self.max_workers, connect_timeout=connect_timeout,
+                                       read_timeout=read_timeout, cache=self.cache,
+                                       tier_stats_file=os.path.join(self.output_dir, 'fetch_tiers.json'),
+                                       archive=self.archive)
         # Charger les offres existantes
         self.existing_jobs = self.load_existing_jobs()
         self.existing_job_ids = set(job.get('id', '') for job in self.existing_jobs if job.get('id'))
         self.log(
             f"Offres existantes chargées: {len(self.existing_jobs)} offres, {len(self.existing_job_ids)} IDs uniques")
-
-    def log(self, message):
-        """Écrire un message dans le fichier de log et l'afficher"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_message = f"[{timestamp}] {message}"
-        print(log_message)
-        with open(self.log_file, 'a', encoding='utf-8') as f:
-            f.write(log_message + '\n')
+        # Les IDs déjà en base font foi pour la déduplication, même sans fichier d'offres existantes
+        self.existing_job_ids |= self.load_known_offer_ids()
+        # Plus grand ID numérique connu: au-dessous, une offre est considérée comme ancienne
+        self.high_water_mark = max((int(offer_id) for offer_id in self.existing_job_ids if offer_id.isdigit()),
+                                   default=0)
+        # Mode incrémental: arrêter la pagination dès qu'une page ne contient que des offres connues ou anciennes
+        self.incremental = incremental
+        self.log(f"IDs connus (fichier + base de données): {len(self.existing_job_ids)}, "
+                 f"plus grand ID connu: {self.high_water_mark}")
+        # Journal du crawl (pages listées, offres en attente/récupérées/en base) pour reprendre après un arrêt
+        self.journal = CrawlJournal(os.path.join(self.progress_dir, 'crawl_journal.db'))
+        self.resume = resume
+        if resume:
+            self.log(f"Reprise depuis le journal: {self.journal.summary()}")
+
+    def log(self, message, **fields):
+        """Écrire un message dans le fichier de log et l'afficher (sans bloquer l'appelant)
+
+        Les champs nommés (page, offer_id, attempt, duration...) sont enregistrés dans l'événement JSON.
+        """
+        self.logger.log(message, **fields)
+
+    def close(self):
+        """Libérer les connexions HTTP du scraper"""
+        if self.cache is not None:
+            self.log(f"Cache des pages: {self.cache.describe()}")
+        self.log(f"Niveaux de récupération: {self.client.describe_tiers()}")
+        if self.archive is not None:
+            self.log(f"Archive HTML: {self.archive.describe()}")
+            self.archive.close()
+        self.client.close()
+        self.journal.close()
+        self.logger.close()
 
     def load_existing_jobs(self):
         """Charger les offres d'emploi existantes"""
@@ -86,8 +155,28 @@ class EducarriereScraper:
         self.log("Aucun fichier d'offres existantes trouvé ou erreur de chargement. Démarrage avec une liste vide.")
         return []
 
-    def scrape_job_listings(self, page=1, max_retries=3):
-        """Scrape les offres d'emploi de la page spécifiée avec gestion des tentatives"""
+    def load_known_offer_ids(self):
+        """Charger les IDs des offres déjà présentes dans la table job_offers"""
+        session = Session()
+        try:
+            known_ids = {offer_id for (offer_id,) in session.query(JobOffer.offer_id) if offer_id}
+            self.log(f"IDs d'offres chargés depuis la base de données: {len(known_ids)}")
+            return known_ids
+        except Exception as e:
+            self.log(f"Erreur lors du chargement des IDs depuis la base de données: {str(e)}")
+            return set()
+        finally:
+            session.close()
+
+    def is_known_or_older(self, job):
+        """Vérifier si une offre est déjà connue ou antérieure au plus grand ID connu"""
+        offer_id = job.get('id', '')
+        if offer_id in self.existing_job_ids:
+            return True
+        return offer_id.isdigit() and int(offer_id) <= self.high_water_mark
+
+    def fetch_listing_page(self, page, max_retries=3):
+        """Récupérer toutes les offres d'une page de listing, ou None en cas d'échec"""
         # Vérifier le format d'URL correct pour la pagination
         if page == 1:
             url = f"{self.base_url}/emploi/page/emploi/1"
@@ -96,407 +185,455 @@ class EducarriereScraper:
 
         self.log(f"URL de scraping: {url}")
 
-        retry_count = 0
-        while retry_count < max_retries:
-            try:
-                self.log(f"Scraping de la page {page} (tentative {retry_count + 1}/{max_retries})...")
-
-                # Paramètres pour ScraperAPI avec temps de rendu plus long
-                payload = {
-                    'api_key': self.api_key,
-                    'url': url,
-                    'render': 'true',
-                    'render_js': 'true',  # S'assurer que JavaScript est rendu
-                    'wait_for': '3000'  # Attendre 3 secondes pour le chargement du JS
-                }
-
-                response = requests.get('https://api.scraperapi.com/', params=payload)
-                response.raise_for_status()
-
-                # Vérifier si la réponse est valide
-                if not response.text:
-                    self.log(f"Réponse vide pour la page {page}, nouvelle tentative...")
-                    retry_count += 1
-                    time.sleep(random.uniform(4, 7))  # Pause aléatoire
-                    continue
-
-                soup = BeautifulSoup(response.text, 'html.parser')
-
-                # Vérifier si la page existe (recherche d'un élément connu)
-                if not soup.find('div', class_='container'):
-                    self.log(f"Structure de page non reconnue pour la page {page}, nouvelle tentative...")
-                    retry_count += 1
-                    time.sleep(random.uniform(4, 7))
-                    continue
-
-                # Recherche de tous les conteneurs d'offres d'emploi
-                job_offers = soup.find_all('div', class_='col-md-6 wow fadeInLeft')
-
-                # Vérifier si des offres ont été trouvées
-                if not job_offers:
-                    self.log(f"Aucune offre trouvée sur la page {page} (tentative {retry_count + 1}/{max_retries})")
+        def parse(html):
+            listing = parse_listing(html, self.all_possible_fields, self.parser_backend)
 
-                    # Vérifier si c'est un problème de sélecteur ou de pagination
-                    pagination = soup.find('div', class_='rt-pagination')
-                    if pagination:
-                        self.log("Pagination trouvée, la page existe mais le format pourrait être différent")
+            # Vérifier si la page existe (recherche d'un élément connu)
+            if not listing.recognized:
+                raise InvalidPageError("Structure de page non reconnue")
 
-                    # Sauvegarder la page HTML pour analyse
-                    debug_file = os.path.join(self.logs_dir, f'debug_page_{page}_{self.session_timestamp}.html')
-                    with open(debug_file, 'w', encoding='utf-8') as f:
-                        f.write(response.text)
-                    self.log(f"Page HTML sauvegardée dans {debug_file} pour analyse")
+            # Vérifier si des offres ont été trouvées
+            if not listing.jobs and not listing.errors:
+                # Vérifier si c'est un problème de sélecteur ou de pagination
+                if listing.has_pagination:
+                    self.log("Pagination trouvée, la page existe mais le format pourrait être différent")
 
-                    retry_count += 1
-                    time.sleep(random.uniform(4, 7))
-                    continue
-
-                jobs = []
-                new_jobs = []
-
-                for job_offer in job_offers:
-                    # Initialiser le job avec tous les champs (vides)
-                    job = {field: "" for field in self.all_possible_fields}
-
-                    try:
-                        # Vérifier si le div contient une offre valide
-                        post_div = job_offer.find('div', class_='rt-post post-md style-8')
-                        if not post_div:
-                            continue
-
-                        # Extraire le titre de l'offre
-                        title_element = job_offer.find('h4', class_='post-title')
-                        if title_element:
-                            job['title'] = title_element.text.strip()
-
-                            # Extraire le lien de l'offre
-                            link_element = title_element.find('a')
-                            if link_element and link_element.has_attr('href'):
-                                job['url'] = link_element['href']
-                                # Extraire l'ID de l'offre à partir de l'URL
-                                match = re.search(r'offre-(\d+)-', job['url'])
-                                if match:
-                                    job['id'] = match.group(1)
-
-                        # Extraire le type d'offre (Consultance, Emploi, etc.)
-                        type_element = job_offer.find('a', class_='racing')
-                        if type_element:
-                            job['type'] = type_element.text.strip()
-
-                        # Extraire les métadonnées (Code, Date d'édition, Date limite)
-                        metadata = job_offer.find('span', class_='rt-meta')
-                        if metadata:
-                            # Chercher tous les li dans la métadonnée
-                            for li in metadata.find_all('li'):
-                                li_text = li.text.strip()
-                                if 'Code:' in li_text:
-                                    code_span = li.find('span', style='color:#FF0000;font-size: 10px;')
-                                    if code_span:
-                                        job['code'] = code_span.text.strip()
-                                elif 'Date d\'édition:' in li_text:
-                                    date_span = li.find('span', style='color:#FF0000;font-size: 10px;')
-                                    if date_span:
-                                        job['date_edition'] = date_span.text.strip()
-                                elif 'Date limite:' in li_text:
-                                    limit_span = li.find('span', style='color:#FF0000;font-size: 10px;')
-                                    if limit_span:
-                                        job['date_limite'] = limit_span.text.strip()
-
-                    except Exception as e:
-                        self.log(f"Erreur lors de l'extraction d'une offre: {str(e)}")
-                        continue
-
-                    # Vérifier si c'est une nouvelle offre
-                    if job.get('id') and job['id'] not in self.existing_job_ids:
-                        self.log(f"Nouvelle offre détectée: ID {job['id']} - {job['title']}")
-                        new_jobs.append(job)
-                    elif not job.get('id'):
-                        self.log(f"Offre sans ID détectée (sera considérée comme nouvelle): {job['title']}")
-                        new_jobs.append(job)
-                    else:
-                        self.log(f"Offre existante ignorée: ID {job['id']} - {job['title']}")
-
-                    jobs.append(job)
+                # Sauvegarder la page HTML pour analyse
+                debug_file = os.path.join(self.logs_dir, f'debug_page_{page}_{self.session_timestamp}.html')
+                with open(debug_file, 'w', encoding='utf-8') as f:
+                    f.write(html)
+                self.log(f"Page HTML sauvegardée dans {debug_file} pour analyse")
 
-                self.log(f"Page {page}: {len(jobs)} offres trouvées, dont {len(new_jobs)} nouvelles offres")
-                return new_jobs  # Retourner uniquement les nouvelles offres
+                raise InvalidPageError(f"Aucune offre trouvée sur la page {page}", slow_down=False)
 
-            except requests.exceptions.RequestException as e:
-                self.log(f"Erreur de requête HTTP lors du scraping de la page {page}: {str(e)}")
-                retry_count += 1
-                time.sleep(random.uniform(5, 10))  # Pause plus longue après une erreur
+            return listing
 
-            except Exception as e:
-                self.log(f"Erreur lors du scraping de la page {page}: {str(e)}")
-                retry_count += 1
-                time.sleep(random.uniform(5, 10))
+        listing = self.client.fetch(url, parse, label=f"la page {page}", max_retries=max_retries, kind='listing')
+        if listing is None:
+            return None
 
-        self.log(f"Échec après {max_retries} tentatives pour la page {page}")
-        return []
+        for error in listing.errors:
+            self.log(f"Erreur lors de l'extraction d'une offre: {error}")
+        return listing.jobs
 
-    def scrape_job_details(self, job_url, max_retries=3):
-        """Scrape les détails d'une offre d'emploi spécifique avec gestion des tentatives"""
-        retry_count = 0
-        while retry_count < max_retries:
-            try:
-                self.log(f"Scraping des détails de {job_url} (tentative {retry_count + 1}/{max_retries})...")
-
-                # Paramètres pour ScraperAPI avec temps de rendu plus long
-                payload = {
-                    'api_key': self.api_key,
-                    'url': job_url,
-                    'render': 'true',
-                    'render_js': 'true',
-                    'wait_for': '3000'
-                }
-
-                response = requests.get('https://api.scraperapi.com/', params=payload)
-                response.raise_for_status()
-
-                if not response.text:
-                    self.log(f"Réponse vide pour {job_url}, nouvelle tentative...")
-                    retry_count += 1
-                    time.sleep(random.uniform(3, 6))
-                    continue
-
-                soup = BeautifulSoup(response.text, 'html.parser')
-
-                # Initialiser les détails avec des champs vides
-                details = {field: "" for field in self.all_possible_fields if
-                           field not in ['type', 'title', 'url', 'id', 'code', 'date_edition', 'date_limite']}
-
-                # Titre de l'offre (pour vérification)
-                title_element = soup.find("h2", class_="title")
-                if title_element:
-                    title = title_element.text.strip()
-                    self.log(f"Titre de l'offre sur la page de détail: {title}")
-                else:
-                    self.log(f"Titre non trouvé pour {job_url}, nouvelle tentative...")
-                    retry_count += 1
-                    time.sleep(random.uniform(3, 6))
+    def select_new_jobs(self, page, jobs):
+        """Filtrer les nouvelles offres d'une page de listing"""
+        new_jobs = []
+        for job in jobs:
+            # Vérifier si c'est une nouvelle offre
+            if job.get('id') and job['id'] not in self.existing_job_ids:
+                self.log(f"Nouvelle offre détectée: ID {job['id']} - {job['title']}", page=page, offer_id=job['id'])
+                new_jobs.append(job)
+            elif not job.get('id'):
+                self.log(f"Offre sans ID détectée (sera considérée comme nouvelle): {job['title']}")
+                new_jobs.append(job)
+            else:
+                self.log(f"Offre existante ignorée: ID {job['id']} - {job['title']}", page=page, offer_id=job['id'])
+
+        self.log(f"Page {page}: {len(jobs)} offres trouvées, dont {len(new_jobs)} nouvelles offres",
+                 page=page, found=len(jobs), new=len(new_jobs))
+        return new_jobs
+
+    def probe_for_new_offers(self):
+        """Sonde peu coûteuse: vérifier sur la page 1 s'il existe des offres inconnues plus récentes
+
+        La page de listing reste en cache quelques minutes, la sonde ne coûte donc pas de requête
+        supplémentaire lorsque le crawl démarre ensuite.
+        """
+        jobs = self.fetch_listing_page(1)
+        if jobs is None:
+            # En cas d'échec de la sonde, laisser le crawl normal décider
+            return True
+        fresh = [job for job in jobs if not self.is_known_or_older(job)]
+        self.log(f"Sonde de la page 1: {len(jobs)} offres, dont {len(fresh)} plus récentes que l'ID {self.high_water_mark}")
+        return bool(fresh)
+
+    def scrape_job_details(self, job_url, max_retries=3, max_age=None):
+        """Scrape les détails d'une offre d'emploi spécifique avec gestion des tentatives
+
+        max_age (en secondes) borne l'âge d'une page de détail reprise du cache.
+        """
+
+        def parse(html):
+            detail = parse_detail(html, self.all_possible_fields, self.parser_backend)
+
+            # Titre de l'offre (pour vérification)
+            if detail.title is None:
+                raise InvalidPageError("Titre non trouvé")
+            self.log(f"Titre de l'offre sur la page de détail: {detail.title}")
+            return detail.details
+
+        details = self.client.fetch(job_url, parse, label=f"détails de {job_url}", max_retries=max_retries,
+                                    kind='detail', max_age=max_age)
+        return details if details is not None else {}
+
+    def _host_slot(self, url):
+        """Retourner le sémaphore limitant les requêtes simultanées vers l'hôte de l'URL"""
+        host = urlparse(url).netloc
+        with self._host_slots_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_slots[host]
+
+    def _fetch_job_details_timed(self, job, position, total, max_age=None):
+        """Récupérer les détails d'une offre en respectant le plafond par hôte, et mesurer la durée
+
+        Le rythme des requêtes est régulé par le limiteur de débit partagé, sans pause fixe.
+        """
+        self.log(f"  Traitement de la nouvelle offre {position}/{total}: {job['title']}", offer_id=job.get('id'))
+        with self._host_slot(job['url']):
+            start = time.perf_counter()
+            details = self.scrape_job_details(job['url'], max_age=max_age)
+            elapsed = time.perf_counter() - start
+        self.log(f"  Détails de l'offre {position}/{total} traités en {elapsed:.2f}s",
+                 offer_id=job.get('id'), duration=round(elapsed, 3), success=bool(details))
+        return details, elapsed
+
+    def scrape_details_concurrently(self, jobs):
+        """Enrichir les offres avec leurs détails en parallèle, en conservant l'ordre d'entrée"""
+        jobs_with_url = []
+        for i, job in enumerate(jobs):
+            if 'url' in job and job['url']:
+                jobs_with_url.append((i, job))
+            else:
+                self.log(f"  Offre {i + 1}/{len(jobs)} sans URL, ignorée.")
+
+        if not jobs_with_url:
+            return []
+
+        wall_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='details') as executor:
+            futures = [executor.submit(self._fetch_job_details_timed, job, i + 1, len(jobs))
+                       for i, job in jobs_with_url]
+            # Les résultats sont lus dans l'ordre de soumission, donc dans l'ordre de la page
+            results = [future.result() for future in futures]
+        wall_time = time.perf_counter() - wall_start
+
+        detailed_jobs = []
+        request_time = 0.0
+        for (_, job), (details, elapsed) in zip(jobs_with_url, results):
+            request_time += elapsed
+            # Une offre sans détails n'est pas retournée: elle n'est ni sauvegardée ni écrite en base,
+            # et reste nouvelle pour le prochain crawl
+            if not details:
+                continue
+            job.update(details)
+            detailed_jobs.append(job)
+
+        speedup = request_time / wall_time if wall_time > 0 else 1.0
+        self.log(f"Détails récupérés pour {len(detailed_jobs)} offres en {wall_time:.2f}s "
+                 f"(temps cumulé des requêtes: {request_time:.2f}s, accélération x{speedup:.2f}, "
+                 f"{self.max_workers} workers, {self.max_per_host} max par hôte)")
+        return detailed_jobs
+
+    def _produce_listings(self, max_pages, detail_queue, result_queue):
+        """Producteur: parcourir les pages de listing et mettre les nouvelles offres dans la file des détails"""
+        queued_total = 0
+        try:
+            for page in range(1, max_pages + 1):
+                # Reprise: une page déjà listée n'est pas redemandée, ses offres en attente viennent du journal
+                if self.resume and self.journal.page_state(page) == CrawlJournal.FETCHED:
+                    queued_total += self._resume_page(page, detail_queue, result_queue)
                     continue
 
-                # Extraire les informations à partir de list-group
-                details_ul = soup.find("ul", class_="list-group")
-                if details_ul:
-                    for item in details_ul.find_all("li", class_="list-group-item"):
-                        text = item.text.strip()
-                        if "Métier(s):" in text:
-                            details['metier'] = text.replace("Métier(s):", "").strip()
-                        elif "Niveau(x):" in text:
-                            details['niveau'] = text.replace("Niveau(x):", "").strip()
-                        elif "Expérience:" in text:
-                            details['experience'] = text.replace("Expérience:", "").strip()
-                        elif "Lieu:" in text:
-                            details['lieu'] = text.replace("Lieu:", "").strip()
-                        elif "Date de publication:" in text:
-                            details['date_publication'] = text.replace("Date de publication:", "").strip()
-                        elif "Date limite:" in text:
-                            details['date_limite'] = text.replace("Date limite:", "").strip()
-
-                # Extraire la description complète et les sections spécifiques
-                post_body = soup.find("div", class_="post-body")
-                if post_body:
-                    # Extraire le contenu principal
-                    content_div = post_body.find('div', class_='col-xl-9')
-                    if content_div:
-                        # Texte complet
-                        details['description_complete'] = content_div.text.strip()
-
-                        # Entreprise (généralement dans le premier paragraphe)
-                        first_p = content_div.find('p')
-                        if first_p:
-                            details['entreprise'] = first_p.text.strip()
-
-                        # Trouver les sections avec des titres soulignés
-                        for p in content_div.find_all('p'):
-                            strong_tag = p.find('span', style='text-decoration: underline;')
-                            if strong_tag:
-                                title_text = strong_tag.text.strip()
-                                next_p = p.find_next('p')
-                                if next_p:
-                                    if 'Description du poste' in title_text:
-                                        details['description_poste'] = next_p.text.strip()
-                                    elif 'Profil du poste' in title_text:
-                                        details['profil_poste'] = next_p.text.strip()
-                                    elif 'Dossiers de candidature' in title_text:
-                                        dossier_text = next_p.text.strip()
-                                        details['dossier_candidature'] = dossier_text
-
-                                        # Extraire les emails du texte de candidature
-                                        email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-                                        emails = re.findall(email_pattern, dossier_text)
-                                        if emails:
-                                            details['email_candidature'] = emails[0]
-
-                return details
-
-            except requests.exceptions.RequestException as e:
-                self.log(f"Erreur de requête HTTP lors du scraping des détails pour {job_url}: {str(e)}")
-                retry_count += 1
-                time.sleep(random.uniform(4, 8))
+                # Scraper les jobs de cette page (seulement les nouveaux)
+                self.journal.mark_page_queued(page)
+                jobs = self.fetch_listing_page(page)
+                new_jobs = self.select_new_jobs(page, jobs) if jobs is not None else []
+
+                # En mode incrémental, une page entièrement connue ou ancienne marque la fin des nouveautés
+                last_page = (self.incremental and jobs is not None
+                             and all(self.is_known_or_older(job) for job in jobs))
+                if last_page:
+                    self.log(f"Page {page}: uniquement des offres connues ou antérieures à l'ID "
+                             f"{self.high_water_mark}. Arrêt de la pagination après cette page.")
+
+                if not new_jobs:
+                    if jobs is not None:
+                        self.journal.mark_page_fetched(page, [])
+                    self.log(f"Aucune nouvelle offre trouvée sur la page {page}. Continuer à la page suivante.")
+                    result_queue.put(('page', page, 0))
+                    if last_page:
+                        break
+
+                    # Si nous n'avons trouvé aucune nouvelle offre sur 2 pages consécutives, arrêtons le scraping
+                    if page > 1 and queued_total == 0:
+                        self.log("Aucune nouvelle offre trouvée sur deux pages consécutives. Arrêt du scraping.")
+                        break
 
-            except Exception as e:
-                self.log(f"Erreur lors du scraping des détails pour {job_url}: {str(e)}")
-                retry_count += 1
-                time.sleep(random.uniform(4, 8))
+                    continue
 
-        self.log(f"Échec après {max_retries} tentatives pour les détails de {job_url}")
-        return {}
+                self.log(f"Page {page}: {len(new_jobs)} nouvelles offres trouvées, récupération des détails...")
+                jobs_with_url = []
+                for i, job in enumerate(new_jobs):
+                    if 'url' in job and job['url']:
+                        jobs_with_url.append((i, job))
+                    else:
+                        self.log(f"  Offre {i + 1}/{len(new_jobs)} sans URL, ignorée.")
+                # Journaliser la page et ses offres avant de les envoyer aux workers
+                self.journal.mark_page_fetched(page, jobs_with_url)
+
+                # Annoncer le nombre d'offres attendues avant de les envoyer, pour que le sink sache quand la page est complète
+                result_queue.put(('page', page, len(jobs_with_url)))
+                for i, job in jobs_with_url:
+                    # Bloque si les workers de détails sont en retard (file bornée)
+                    detail_queue.put((page, i, len(new_jobs), job))
+                queued_total += len(jobs_with_url)
+
+                if last_page:
+                    break
+                if page < max_pages:
+                    self.log(f"Passage à la page suivante (débit actuel: {self.rate_limiter.describe()})")
+        except Exception as e:
+            self.log(f"Erreur lors du parcours des pages de listing: {str(e)}")
+        finally:
+            # Un signal de fin par worker de détails
+            for _ in range(self.max_workers):
+                detail_queue.put(None)
+
+    def _resume_page(self, page, detail_queue, result_queue):
+        """Renvoyer dans le pipeline les offres journalisées d'une page déjà listée
+
+        Les offres déjà récupérées vont directement au sink, celles en attente aux workers de détails,
+        celles déjà en base sont ignorées. Retourne le nombre d'offres journalisées pour la page.
+        """
+        offers = [(position, JobRecord.from_dict(job), state) for position, job, state in self.journal.page_offers(page)]
+        pending = [(position, job, state) for position, job, state in offers if state != CrawlJournal.PERSISTED]
+        self.log(f"Page {page} reprise depuis le journal: {len(pending)} offres à terminer sur {len(offers)}.",
+                 page=page, jobs=len(pending))
+        result_queue.put(('page', page, len(pending)))
+        for position, job, state in pending:
+            if state == CrawlJournal.FETCHED:
+                result_queue.put(('job', page, position, job, 0.0, True))
+            else:
+                detail_queue.put((page, position, len(offers), job))
+        return len(offers)
+
+    def _detail_worker(self, detail_queue, result_queue):
+        """Worker: récupérer les détails des offres de la file et transmettre les résultats au sink"""
+        try:
+            while True:
+                item = detail_queue.get()
+                if item is None:
+                    break
+                page, index, total, job = item
+                try:
+                    details, elapsed = self._fetch_job_details_timed(job, index + 1, total)
+                except Exception as e:
+                    self.log(f"Erreur lors de la récupération des détails de {job['url']}: {str(e)}")
+                    details, elapsed = {}, 0.0
+                job.update(details)
+                # Une offre sans détails reste en attente dans le journal, pour être retentée à la reprise
+                if details:
+                    self.journal.mark_offer_fetched(job)
+                result_queue.put(('job', page, index, job, elapsed, bool(details)))
+        finally:
+            result_queue.put(('done',))
 
     def scrape_all_jobs_with_details(self, max_pages=3):
-        """Scrape toutes les nouvelles offres d'emploi avec leurs détails page par page"""
+        """Scrape toutes les nouvelles offres d'emploi avec leurs détails, en pipeline
+
+        Un producteur parcourt les pages de listing, un pool de workers récupère les détails et le
+        thread appelant sert de sink de persistance. Les étapes sont reliées par des files bornées:
+        les pages suivantes sont listées pendant que les détails des précédentes sont en cours.
+        Chaque offre détaillée est ajoutée au fichier NDJSON de la session dès son arrivée.
+        """
+        # Le journal n'est vidé qu'au lancement d'un nouveau crawl: un rafraîchissement le laisse intact
+        # pour qu'un crawl interrompu reste reprenable
+        if not self.resume:
+            self.journal.reset()
+        sink = NDJSONSink(self.progress_file, self.all_possible_fields)
+        detail_queue = queue.Queue(maxsize=self.max_workers * 2)
+        result_queue = queue.Queue(maxsize=self.max_workers * 4)
+
+        wall_start = time.perf_counter()
+        threads = [threading.Thread(target=self._produce_listings, args=(max_pages, detail_queue, result_queue),
+                                    name='listings', daemon=True)]
+        threads += [threading.Thread(target=self._detail_worker, args=(detail_queue, result_queue),
+                                     name=f'details-{i}', daemon=True) for i in range(self.max_workers)]
+        for thread in threads:
+            thread.start()
+
+        expected = {}  # page -> nombre d'offres attendues
+        received = {}  # page -> nombre d'offres reçues
         all_new_detailed_jobs = []
+        request_time = 0.0
+        workers_done = 0
 
-        for page in range(1, max_pages + 1):
-            # Scraper les jobs de cette page (seulement les nouveaux)
-            new_jobs = self.scrape_job_listings(page)
-            if not new_jobs:
-                self.log(f"Aucune nouvelle offre trouvée sur la page {page}. Continuer à la page suivante.")
-
-                # Si nous n'avons trouvé aucune nouvelle offre sur 2 pages consécutives, arrêtons le scraping
-                if page > 1 and len(all_new_detailed_jobs) == 0:
-                    self.log("Aucune nouvelle offre trouvée sur deux pages consécutives. Arrêt du scraping.")
-                    break
-
+        while workers_done < self.max_workers:
+            message = result_queue.get()
+            if message[0] == 'done':
+                workers_done += 1
                 continue
-
-            detailed_new_jobs = []
-            self.log(f"Page {page}: {len(new_jobs)} nouvelles offres trouvées, récupération des détails...")
-
-            # Enrichir chaque nouvelle offre de cette page avec ses détails
-            for i, job in enumerate(new_jobs):
-                if 'url' in job and job['url']:
-                    self.log(f"  Traitement de la nouvelle offre {i + 1}/{len(new_jobs)}: {job['title']}")
-                    details = self.scrape_job_details(job['url'])
-                    job.update(details)
-                    detailed_new_jobs.append(job)
-
-                    # Pause aléatoire pour éviter de surcharger le serveur
-                    delay = random.uniform(3, 7)
-                    self.log(f"  Pause de {delay:.2f} secondes...")
-                    time.sleep(delay)
-                else:
-                    self.log(f"  Offre {i + 1}/{len(new_jobs)} sans URL, ignorée.")
-
-            all_new_detailed_jobs.extend(detailed_new_jobs)
-            self.log(f"Page {page} terminée: {len(detailed_new_jobs)} nouvelles offres détaillées récupérées.")
-
-            # Sauvegarder progressivement au cas où le script s'arrête
-            if detailed_new_jobs:
-                page_csv = os.path.join(self.progress_dir, f'educarriere_new_page_{page}_{self.session_timestamp}.csv')
-                page_json = os.path.join(self.progress_dir,
-                                         f'educarriere_new_page_{page}_{self.session_timestamp}.json')
-
-                self.save_to_csv(detailed_new_jobs, page_csv)
-                self.save_to_json(detailed_new_jobs, page_json)
-                self.log(f"Sauvegarde progressive des nouvelles offres de la page {page} effectuée")
-
-            # Pause aléatoire avant de passer à la page suivante
-            if page < max_pages:
-                delay = random.uniform(8, 15)
-                self.log(f"Pause de {delay:.2f} secondes avant de passer à la page suivante...")
-                time.sleep(delay)
-
-        return all_new_detailed_jobs
-
-    def save_to_csv(self, jobs, filename):
-        """Sauvegarder les offres d'emploi dans un fichier CSV avec tous les champs"""
-        # S'assurer que tous les champs possibles sont présents dans chaque job
-        for job in jobs:
-            for field in self.all_possible_fields:
-                if field not in job:
-                    job[field] = ""
-
-        # Créer un DataFrame avec l'ordre spécifique des colonnes
-        df = pd.DataFrame(jobs, columns=self.all_possible_fields)
-        df.to_csv(filename, index=False, encoding='utf-8-sig')
-        self.log(f"Les offres ont été sauvegardées dans '{filename}' avec tous les champs")
-
-    def save_to_json(self, jobs, filename):
-        """Sauvegarder les offres d'emploi dans un fichier JSON"""
-        # S'assurer que tous les champs possibles sont présents dans chaque job
-        for job in jobs:
-            for field in self.all_possible_fields:
-                if field not in job:
-                    job[field] = ""
-
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(jobs, f, ensure_ascii=False, indent=4)
-        self.log(f"Les offres ont été sauvegardées dans '{filename}' avec tous les champs")
+            if message[0] == 'page':
+                _, page, count = message
+                expected[page] = count
+                received.setdefault(page, 0)
+            else:
+                _, page, index, job, elapsed, fetched = message
+                received[page] += 1
+                request_time += elapsed
+                # Une offre sans détails n'est ni sauvegardée ni écrite en base: elle reste en attente
+                # dans le journal et sera retentée à la reprise
+                if fetched:
+                    all_new_detailed_jobs.append((page, index, job))
+                    # Sauvegarde progressive immédiate, pour ne rien perdre si le script s'arrête
+                    sink.write(job)
+
+            # Les pages peuvent se terminer dans le désordre
+            if page in expected and received[page] == expected[page]:
+                self.log(f"Page {page} terminée: {expected.pop(page)} nouvelles offres détaillées récupérées.",
+                         page=page, jobs=received.pop(page))
+
+        for thread in threads:
+            thread.join()
+
+        for output in sink.close(convert_to=self.progress_formats if sink.count else ()):
+            self.log(f"Les offres ont été sauvegardées dans '{output}' avec tous les champs")
+        if sink.count:
+            self.log(f"Sauvegarde progressive: {sink.count} offres dans '{self.progress_file}'")
+
+        wall_time = time.perf_counter() - wall_start
+        speedup = request_time / wall_time if wall_time > 0 else 1.0
+        self.log(f"Pipeline terminé: {len(all_new_detailed_jobs)} offres détaillées en {wall_time:.2f}s "
+                 f"(temps cumulé des requêtes de détails: {request_time:.2f}s, accélération x{speedup:.2f})",
+                 jobs=len(all_new_detailed_jobs), duration=round(wall_time, 3), request_time=round(request_time, 3))
+
+        # Restituer l'ordre des pages et des offres dans chaque page
+        all_new_detailed_jobs.sort(key=lambda item: (item[0], item[1]))
+        return [job for _, _, job in all_new_detailed_jobs]
 
     def update_database(self, new_jobs):
-        """Mettre à jour la base de données SQL avec les nouvelles offres"""
+        """Mettre à jour la base de données SQL avec les nouvelles offres (upsert par lots sur offer_id)"""
         if not new_jobs:
             self.log("Aucune nouvelle offre à ajouter à la base de données.")
             return
 
         self.log(f"Mise à jour de la base de données avec {len(new_jobs)} nouvelles offres...")
 
-        # Créer une session SQLAlchemy
-        session = Session()
-
-        try:
-            for job in new_jobs:
-                # Convertir les dates
-                date_edition = None
-                date_limite = None
-                date_publication = None
-
-                if job.get('date_edition'):
-                    try:
-                        date_edition = datetime.strptime(job['date_edition'], "%d/%m/%Y").date()
-                    except:
-                        pass
-
-                if job.get('date_limite'):
-                    try:
-                        date_limite = datetime.strptime(job['date_limite'], "%d/%m/%Y").date()
-                    except:
-                        pass
-
-                if job.get('date_publication'):
-                    try:
-                        date_publication = datetime.strptime(job['date_publication'], "%d/%m/%Y").date()
-                    except:
-                        pass
-
-                # Créer un nouvel objet JobOffer
-                job_offer = JobOffer(
-                    offer_id=job.get('id', ''),
-                    type=job.get('type', ''),
-                    title=job.get('title', ''),
-                    url=job.get('url', ''),
-                    code=job.get('code', ''),
-                    date_edition=date_edition,
-                    date_limite=date_limite,
-                    metier=job.get('metier', ''),
-                    niveau=job.get('niveau', ''),
-                    experience=job.get('experience', ''),
-                    lieu=job.get('lieu', ''),
-                    date_publication=date_publication,
-                    entreprise=job.get('entreprise', ''),
-                    description_poste=job.get('description_poste', ''),
-                    profil_poste=job.get('profil_poste', ''),
-                    dossier_candidature=job.get('dossier_candidature', ''),
-                    email_candidature=job.get('email_candidature', ''),
-                    description_complete=job.get('description_complete', ''),
-                    date_added=datetime.now().date()
-                )
-
-                # Ajouter à la session
-                session.add(job_offer)
-
-            # Valider les changements
-            session.commit()
-            self.log(f"Base de données mise à jour avec succès!")
-
-        except Exception as e:
-            session.rollback()
-            self.log(f"Erreur lors de la mise à jour de la base de données: {str(e)}")
-        finally:
-            session.close()
-
+        rows = []
+        for job in new_jobs:
+            if not job.get('id'):
+                self.log(f"Offre sans ID ignorée pour la base de données: {job.get('title', '')}")
+                continue
+            rows.append(JobRecord.coerce(job).to_row())
+
+        start = time.perf_counter()
+        result = upsert_job_offers(engine, rows, log=self.log)
+        elapsed = time.perf_counter() - start
+        self.log(f"Base de données mise à jour en {elapsed:.2f}s: {result.inserted} offres ajoutées, "
+                 f"{result.updated} mises à jour, {result.unchanged} inchangées, {result.failed} en erreur, "
+                 f"{result.duplicates} doublons dans le lot",
+                 inserted=result.inserted, updated=result.updated, unchanged=result.unchanged,
+                 failed=result.failed, duplicates=result.duplicates, duration=round(elapsed, 3))
+        date_failures = describe_date_failures()
+        if date_failures:
+            self.log(f"Attention: {date_failures}")
+        # Les lots en erreur sont annulés sans savoir quelles offres ils contenaient: tout reste à reprendre
+        if result.failed == 0:
+            self.journal.mark_persisted([row['url'] for row in rows])
+        return result
+
+    @staticmethod
+    def row_to_job(row):
+        """Convertir une ligne de job_offers en offre au format du scraper (dates JJ/MM/AAAA)"""
+        job = JobRecord()
+        for field in ALL_FIELDS:
+            value = getattr(row, 'offer_id' if field == 'id' else field)
+            if hasattr(value, 'strftime'):
+                value = value.strftime("%d/%m/%Y")
+            job[field] = value if value is not None else ''
+        return job
+
+    def refresh_interval(self, published, today):
+        """Intervalle entre deux vérifications d'une offre publiée à la date indiquée"""
+        age = (today - published).days if published else None
+        for max_age_days, interval in self.REFRESH_SCHEDULE:
+            if age is not None and age <= max_age_days:
+                return interval
+        return self.REFRESH_DEFAULT_INTERVAL
+
+    def select_offers_to_refresh(self, max_offers, now=None):
+        """Offres encore dans leur délai de candidature dont la vérification est due
+
+        Les offres sont parcourues de la plus récemment publiée à la plus ancienne et la sélection est
+        plafonnée à max_offers: les publications récentes passent en premier.
+        """
+        now = now or datetime.now()
+        today = now.date()
+        offers = JobOffer.__table__
+        fingerprints = OfferFingerprint.__table__
+        query = (select(offers, fingerprints.c.fingerprint, fingerprints.c.checked_at, fingerprints.c.changed_at)
+                 .select_from(offers.outerjoin(fingerprints, fingerprints.c.offer_id == offers.c.offer_id))
+                 .where(offers.c.date_limite >= today)
+                 .order_by(offers.c.date_publication.desc().nulls_last(), offers.c.offer_id.desc()))
+
+        selected = []
+        in_window = 0
+        with engine.connect() as conn:
+            for row in conn.execute(query):
+                in_window += 1
+                if len(selected) >= max_offers:
+                    continue
+                published = row.date_publication or row.date_added
+                if row.checked_at is None or now - row.checked_at >= self.refresh_interval(published, today):
+                    selected.append(row)
+        self.log(f"Rafraîchissement: {len(selected)} offres à vérifier sur {in_window} encore ouvertes",
+                 selected=len(selected), in_window=in_window)
+        return selected
+
+    def refresh_stored_offers(self, max_offers=200):
+        """Revérifier les offres encore ouvertes et ne réécrire que celles dont le contenu a changé
+
+        L'empreinte du contenu de chaque offre est conservée dans offer_fingerprints; une offre dont la
+        page de détail n'a pas pu être récupérée n'est pas marquée comme vérifiée.
+        """
+        start = time.perf_counter()
+        now = datetime.now()
+        candidates = self.select_offers_to_refresh(max_offers, now)
+        if not candidates:
+            self.log("Aucune offre à rafraîchir.")
+            return None
+
+        jobs = [self.row_to_job(row) for row in candidates]
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='refresh') as executor:
+            futures = [executor.submit(self._fetch_job_details_timed, job, i + 1, len(jobs),
+                                       max_age=self.REFRESH_CACHE_MAX_AGE)
+                       for i, job in enumerate(jobs)]
+            results = [future.result() for future in futures]
+
+        changed_rows = []
+        entries = []
+        unchanged = failed = 0
+        for row, job, (details, _) in zip(candidates, jobs, results):
+            if not details:
+                failed += 1
+                continue
+            job.update(details)
+            job_row = job.to_row()
+            fingerprint = offer_fingerprint(job_row)
+            # Première vérification: l'empreinte de référence est celle de la ligne déjà en base
+            previous = row.fingerprint or offer_fingerprint(row._mapping)
+            changed = fingerprint != previous
+            if changed:
+                changed_rows.append(job_row)
+            else:
+                unchanged += 1
+            entries.append({'offer_id': row.offer_id, 'fingerprint': fingerprint, 'checked_at': now,
+                            'changed_at': now if changed else row.changed_at})
+
+        result = upsert_job_offers(engine, changed_rows, log=self.log) if changed_rows else None
+        if result is not None and result.failed:
+            # Les offres modifiées non écrites gardent leur ancienne empreinte pour être retentées
+            changed_ids = {job_row['offer_id'] for job_row in changed_rows}
+            entries = [entry for entry in entries if entry['offer_id'] not in changed_ids]
+        save_fingerprints(engine, entries)
+
+        elapsed = time.perf_counter() - start
+        self.log(f"Rafraîchissement terminé en {elapsed:.2f}s: {len(candidates)} offres vérifiées, "
+                 f"{len(changed_rows)} modifiées, {unchanged} inchangées, {failed} en échec",
+                 checked=len(candidates), changed=len(changed_rows), failed=failed, duration=round(elapsed, 3))
+        return result
 
 
 
@@ -613,11 +750,34 @@ if __name__ == "__main__":
     # Récupérer la clé API depuis les variables d'environnement pour GitHub Actions
     api_key = os.environ.get('SCRAPY_API_KEY')
 
-    scraper = EducarriereScraper(api_key)
+    arg_parser = argparse.ArgumentParser(description="Scraper des offres d'emploi d'Educarriere")
+    arg_parser.add_argument('--resume', action='store_true',
+                            help="Reprendre le crawl interrompu depuis le journal au lieu de repartir de zéro")
+    arg_parser.add_argument('--refresh', action='store_true',
+                            help="Revérifier les offres déjà en base encore ouvertes au lieu de chercher de nouvelles offres")
+    arg_parser.add_argument('--refresh-limit', type=int, default=200,
+                            help="Nombre maximal d'offres revérifiées par exécution (défaut: 200)")
+    args = arg_parser.parse_args()
+
+    # Nombre de workers pour la récupération des détails et plafond de requêtes simultanées par hôte (ajustables)
+    # Le mode incrémental s'appuie sur les IDs déjà en base pour s'arrêter dès la première page sans nouveauté
+    scraper = EducarriereScraper(api_key, max_workers=4, max_per_host=2, incremental=True, resume=args.resume)
 
     # Nombre de pages à scraper (ajustable)
     max_pages =1
 
+    # Mode rafraîchissement: seules les offres déjà en base sont revérifiées
+    if args.refresh:
+        scraper.refresh_stored_offers(max_offers=args.refresh_limit)
+        scraper.close()
+        sys.exit(0)
+
+    # Sonde de la page 1: si le site n'a pas changé, l'exécution est ignorée (sauf reprise d'un crawl interrompu)
+    if not args.resume and not scraper.probe_for_new_offers():
+        scraper.log("Aucune offre plus récente que la dernière connue. Exécution ignorée.")
+        scraper.close()
+        sys.exit(0)
+
     # Débuter le scraping
     scraper.log("Démarrage du scraping pour les nouvelles offres d'emploi uniquement...")
     new_detailed_jobs = scraper.scrape_all_jobs_with_details(max_pages=max_pages)
@@ -627,3 +787,4 @@ if __name__ == "__main__":
 
     # Log final
     scraper.log(f"Scraping terminé avec succès! {len(new_detailed_jobs)} nouvelles offres détaillées ajoutées.")
+    scraper.close()
@@ -0,0 +1,439 @@
+"""Extraction des offres depuis les pages HTML d'educarriere, avec des backends d'analyse interchangeables
+
+Backends disponibles:
+- 'html.parser': arbre complet avec le parseur de la bibliothèque standard (référence historique)
+- 'lxml': arbre complet avec lxml
+- 'fast': analyse ciblée (SoupStrainer) des seuls sous-arbres utiles, avec lxml si disponible
+
+Les champs sont décrits de façon déclarative (LISTING_SPEC, DETAIL_SPEC: champ -> règle, post-traitement)
+et compilés au chargement du module en extracteurs qui ne visitent chaque élément qu'une fois.
+Pour suivre un changement de balisage d'educarriere, il suffit en général de modifier ces spécifications.
+
+Utilisation en ligne de commande (parité entre backends et micro-benchmark sur des pages sauvegardées):
+    python -m scraper.extraction educarriere_data/logs/debug_page_*.html
+"""
+import re
+import sys
+import time
+from collections import namedtuple
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from api.records import JOB_FIELDS, JobRecord
+
+try:
+    import lxml  # noqa: F401
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# Tous les champs possibles d'une offre, dans l'ordre des colonnes CSV
+ALL_FIELDS = list(JOB_FIELDS)
+
+# Champs extraits depuis la carte de l'offre sur la page de listing (les autres viennent de la page de détail)
+LISTING_FIELDS = ['type', 'title', 'url', 'id', 'code', 'date_edition', 'date_limite']
+
+LISTING_CARD_CLASS = 'col-md-6 wow fadeInLeft'
+
+ListingPage = namedtuple('ListingPage', ['jobs', 'recognized', 'has_pagination', 'errors'])
+DetailPage = namedtuple('DetailPage', ['title', 'details'])
+
+# Sous-arbres utiles pour l'analyse ciblée
+LISTING_STRAINER = SoupStrainer('div', class_=LISTING_CARD_CLASS)
+DETAIL_STRAINER = SoupStrainer(['h2', 'ul', 'div'],
+                               class_=re.compile(r'(^|\s)(title|list-group|post-body)(\s|$)'))
+
+
+class ParserBackend:
+    """Stratégie de construction des arbres BeautifulSoup pour les pages de listing et de détail"""
+
+    def __init__(self, name, features, targeted):
+        self.name = name
+        self.features = features
+        self.targeted = targeted
+
+    def soup(self, html, strainer=None):
+        return BeautifulSoup(html, self.features, parse_only=strainer if self.targeted else None)
+
+    def full_soup(self, html):
+        return BeautifulSoup(html, self.features)
+
+
+BACKENDS = {
+    'html.parser': ParserBackend('html.parser', 'html.parser', targeted=False),
+    'lxml': ParserBackend('lxml', 'lxml', targeted=False),
+    'fast': ParserBackend('fast', 'lxml' if LXML_AVAILABLE else 'html.parser', targeted=True),
+}
+
+DEFAULT_BACKEND = 'fast'
+
+
+def get_backend(name=None):
+    """Retourner le backend demandé, en vérifiant que ses dépendances sont installées"""
+    name = name or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Backend d'analyse inconnu: {name} (disponibles: {', '.join(BACKENDS)})")
+    if BACKENDS[name].features == 'lxml' and not LXML_AVAILABLE:
+        raise ValueError(f"Le backend '{name}' nécessite le paquet lxml")
+    return BACKENDS[name]
+
+
+# Expressions régulières compilées une seule fois pour tout le processus
+OFFER_ID_RE = re.compile(r'offre-(\d+)-')
+EMAIL_RE = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
+# Règles d'extraction. Un chemin est une liste de (balise, classe) parcourue avec find().
+Selector = namedtuple('Selector', ['path', 'attr'])  # Texte (ou attribut) de l'élément au bout du chemin
+Label = namedtuple('Label', ['group', 'label'])  # Élément d'une liste libellée dont le texte contient le libellé
+Section = namedtuple('Section', ['label'])  # Paragraphe qui suit un titre souligné contenant le libellé
+ContentText = namedtuple('ContentText', [])  # Texte complet du bloc de contenu
+FirstParagraph = namedtuple('FirstParagraph', [])  # Premier paragraphe du bloc de contenu
+Derived = namedtuple('Derived', ['source'])  # Valeur calculée à partir d'un autre champ déjà extrait
+
+# Liste libellée: conteneur, éléments, et emplacement de la valeur dans l'élément (None = tout le texte)
+LabelGroup = namedtuple('LabelGroup', ['container', 'item', 'value'])
+
+
+# Post-traitements: retournent la valeur du champ, ou None pour laisser le champ inchangé
+def strip(value, rule):
+    return value.strip()
+
+
+def strip_label(value, rule):
+    return value.replace(rule.label, "").strip()
+
+
+def regex_group(pattern, group=1):
+    def post(value, rule):
+        match = pattern.search(value)
+        return match.group(group) if match else None
+    return post
+
+
+def first_match(pattern):
+    def post(value, rule):
+        matches = pattern.findall(value)
+        return matches[0] if matches else None
+    return post
+
+
+VALUE_SPAN = ('span', {'style': 'color:#FF0000;font-size: 10px;'})
+SECTION_MARKER = ('span', {'style': 'text-decoration: underline;'})
+
+# Spécification de la carte d'une offre sur la page de listing: champ -> (règle, post-traitement)
+LISTING_SPEC = {
+    'title': (Selector([('h4', 'post-title')], None), strip),
+    'url': (Selector([('h4', 'post-title'), ('a', None)], 'href'), None),
+    'id': (Derived('url'), regex_group(OFFER_ID_RE)),
+    'type': (Selector([('a', 'racing')], None), strip),
+    'code': (Label('meta', 'Code:'), strip),
+    'date_edition': (Label('meta', 'Date d\'édition:'), strip),
+    'date_limite': (Label('meta', 'Date limite:'), strip),
+}
+LISTING_GROUPS = {
+    'meta': LabelGroup([('span', 'rt-meta')], ('li', None), VALUE_SPAN),
+}
+# Une carte n'est une offre que si elle contient ce bloc
+LISTING_REQUIRED = [('div', 'rt-post post-md style-8')]
+
+# Spécification de la page de détail d'une offre
+DETAIL_SPEC = {
+    'metier': (Label('infos', 'Métier(s):'), strip_label),
+    'niveau': (Label('infos', 'Niveau(x):'), strip_label),
+    'experience': (Label('infos', 'Expérience:'), strip_label),
+    'lieu': (Label('infos', 'Lieu:'), strip_label),
+    'date_publication': (Label('infos', 'Date de publication:'), strip_label),
+    'date_limite': (Label('infos', 'Date limite:'), strip_label),
+    'description_complete': (ContentText(), strip),
+    'entreprise': (FirstParagraph(), strip),  # Généralement dans le premier paragraphe
+    'description_poste': (Section('Description du poste'), strip),
+    'profil_poste': (Section('Profil du poste'), strip),
+    'dossier_candidature': (Section('Dossiers de candidature'), strip),
+    'email_candidature': (Derived('dossier_candidature'), first_match(EMAIL_RE)),
+}
+DETAIL_GROUPS = {
+    'infos': LabelGroup([('ul', 'list-group')], ('li', 'list-group-item'), None),
+}
+DETAIL_CONTENT = [('div', 'post-body'), ('div', 'col-xl-9')]
+
+
+def _find(node, tag, css_class):
+    if isinstance(css_class, dict):
+        return node.find(tag, attrs=css_class)
+    return node.find(tag, class_=css_class) if css_class else node.find(tag)
+
+
+def _find_path(node, path):
+    for tag, css_class in path:
+        node = _find(node, tag, css_class)
+        if node is None:
+            return None
+    return node
+
+
+class CompiledExtractor:
+    """Extracteur en une passe compilé à partir d'une spécification déclarative
+
+    Chaque élément de liste libellée et chaque paragraphe du contenu n'est visité qu'une fois.
+    """
+
+    def __init__(self, spec, groups=None, content_path=None, required=None):
+        self.spec = spec
+        self.group_specs = groups or {}
+        self.required = required or []
+        self.content_path = content_path
+        self._restricted = {}  # Extracteurs limités à un ensemble de champs, compilés à la première demande
+        self.selectors = []
+        self.groups = {name: (group, []) for name, group in (groups or {}).items()}
+        self.sections = []
+        self.content_fields = []
+        self.first_paragraph_fields = []
+        self.derived = []
+
+        # Les règles gardent l'ordre de la spécification, qui fixe la priorité entre libellés
+        for field, (rule, post) in spec.items():
+            if isinstance(rule, Selector):
+                self.selectors.append((field, rule, post))
+            elif isinstance(rule, Label):
+                self.groups[rule.group][1].append((field, rule, post))
+            elif isinstance(rule, Section):
+                self.sections.append((field, rule, post))
+            elif isinstance(rule, ContentText):
+                self.content_fields.append((field, rule, post))
+            elif isinstance(rule, FirstParagraph):
+                self.first_paragraph_fields.append((field, rule, post))
+            elif isinstance(rule, Derived):
+                self.derived.append((field, rule, post))
+            else:
+                raise ValueError(f"Règle d'extraction inconnue pour le champ {field}: {rule!r}")
+
+    def restrict(self, fields):
+        """Extracteur limité aux champs demandés et aux champs dont ils dépendent (Derived)
+
+        Chaque ensemble de champs n'est compilé qu'une fois; fields=None garde tous les champs.
+        """
+        if fields is None:
+            return self
+        wanted = frozenset(fields)
+        extractor = self._restricted.get(wanted)
+        if extractor is None:
+            needed = set(wanted)
+            needed.update(rule.source for field, (rule, _) in self.spec.items()
+                          if field in wanted and isinstance(rule, Derived))
+            spec = {field: rule for field, rule in self.spec.items() if field in needed}
+            extractor = CompiledExtractor(spec, self.group_specs, self.content_path, self.required)
+            self._restricted[wanted] = extractor
+        return extractor
+
+    @staticmethod
+    def _set(record, field, rule, post, value):
+        if post is not None:
+            value = post(value, rule)
+        if value is not None:
+            record[field] = value
+
+    def matches(self, root):
+        """Vérifier que l'élément contient les blocs requis par la spécification"""
+        return all(_find_path(root, [step]) is not None for step in self.required)
+
+    def extract(self, root, record):
+        """Remplir record avec les champs trouvés sous root et le retourner"""
+        for field, rule, post in self.selectors:
+            element = _find_path(root, rule.path)
+            if element is None:
+                continue
+            if rule.attr:
+                if not element.has_attr(rule.attr):
+                    continue
+                self._set(record, field, rule, post, element[rule.attr])
+            else:
+                self._set(record, field, rule, post, element.text)
+
+        for group, rules in self.groups.values():
+            if not rules:
+                continue
+            container = _find_path(root, group.container)
+            if container is None:
+                continue
+            tag, css_class = group.item
+            items = container.find_all(tag, class_=css_class) if css_class else container.find_all(tag)
+            for item in items:
+                text = item.text.strip()
+                # Le premier libellé trouvé dans le texte détermine le champ
+                for field, rule, post in rules:
+                    if rule.label in text:
+                        if group.value is None:
+                            self._set(record, field, rule, post, text)
+                        else:
+                            value_element = _find(item, *group.value)
+                            if value_element is not None:
+                                self._set(record, field, rule, post, value_element.text)
+                        break
+
+        if self.content_path and (self.content_fields or self.first_paragraph_fields or self.sections):
+            content = _find_path(root, self.content_path)
+            if content is not None:
+                for field, rule, post in self.content_fields:
+                    self._set(record, field, rule, post, content.text)
+
+                paragraphs = content.find_all('p')
+                for index, p in enumerate(paragraphs):
+                    if index == 0:
+                        for field, rule, post in self.first_paragraph_fields:
+                            self._set(record, field, rule, post, p.text)
+                    if not self.sections:
+                        continue
+                    marker = _find(p, *SECTION_MARKER)
+                    if marker is None:
+                        continue
+                    title_text = marker.text.strip()
+                    # Le paragraphe suivant est cherché dans le bloc de contenu seulement: au-delà, l'arbre
+                    # dépend du backend (l'analyse ciblée ne garde pas le pied de page)
+                    if index + 1 >= len(paragraphs):
+                        continue
+                    next_p = paragraphs[index + 1]
+                    for field, rule, post in self.sections:
+                        if rule.label in title_text:
+                            self._set(record, field, rule, post, next_p.text)
+                            break
+
+        for field, rule, post in self.derived:
+            self._set(record, field, rule, post, record.get(rule.source) or "")
+
+        return record
+
+
+# Extracteurs compilés une seule fois au chargement du module
+LISTING_EXTRACTOR = CompiledExtractor(LISTING_SPEC, LISTING_GROUPS, required=LISTING_REQUIRED)
+DETAIL_EXTRACTOR = CompiledExtractor(DETAIL_SPEC, DETAIL_GROUPS, content_path=DETAIL_CONTENT)
+
+
+def _extract_listing_job(job_offer, extractor=LISTING_EXTRACTOR):
+    """Extraire les champs d'une carte d'offre, ou None si la carte ne contient pas d'offre"""
+    if not extractor.matches(job_offer):
+        return None
+    # Le JobRecord a déjà tous les champs (vides)
+    return extractor.extract(job_offer, JobRecord())
+
+
+def parse_listing(html, fields, backend=None):
+    """Analyser une page de listing et retourner ses offres (JobRecord avec tous les champs)
+
+    Seuls les champs de fields (et ceux dont ils dépendent) sont extraits, les autres restent vides.
+    """
+    backend = get_backend(backend)
+    extractor = LISTING_EXTRACTOR.restrict(fields)
+    soup = backend.soup(html, LISTING_STRAINER)
+    job_offers = soup.find_all('div', class_=LISTING_CARD_CLASS)
+
+    if job_offers:
+        recognized, has_pagination = True, None
+    else:
+        # Aucune carte: analyser toute la page pour distinguer une structure inconnue d'une page vide
+        full = backend.full_soup(html) if backend.targeted else soup
+        recognized = bool(full.find('div', class_='container'))
+        has_pagination = bool(full.find('div', class_='rt-pagination'))
+
+    jobs = []
+    errors = []
+    for job_offer in job_offers:
+        try:
+            job = _extract_listing_job(job_offer, extractor)
+        except Exception as e:
+            errors.append(str(e))
+            continue
+        if job is not None:
+            jobs.append(job)
+
+    return ListingPage(jobs, recognized, has_pagination, errors)
+
+
+def parse_detail(html, fields, backend=None):
+    """Analyser une page de détail; le titre vaut None si la page n'est pas reconnue
+
+    Seuls les champs de fields (et ceux dont ils dépendent) sont extraits.
+    """
+    backend = get_backend(backend)
+    soup = backend.soup(html, DETAIL_STRAINER)
+
+    # Titre de l'offre (pour vérification)
+    title_element = soup.find("h2", class_="title")
+    if not title_element:
+        return DetailPage(None, {})
+
+    # Initialiser les détails avec des champs vides
+    details = {field: "" for field in fields if field not in LISTING_FIELDS}
+    DETAIL_EXTRACTOR.restrict(fields).extract(soup, details)
+
+    return DetailPage(title_element.text.strip(), details)
+
+
+def detect_page_kind(html):
+    """Deviner le type d'une page sauvegardée ('listing' ou 'detail')"""
+    return 'listing' if LISTING_CARD_CLASS in html else 'detail'
+
+
+def parse_page(html, fields, backend=None, kind=None):
+    """Analyser une page de l'un ou l'autre type"""
+    kind = kind or detect_page_kind(html)
+    if kind == 'listing':
+        return parse_listing(html, fields, backend)
+    return parse_detail(html, fields, backend)
+
+
+def available_backends():
+    """Backends utilisables avec les dépendances installées"""
+    names = []
+    for name in BACKENDS:
+        try:
+            get_backend(name)
+            names.append(name)
+        except ValueError:
+            pass
+    return names
+
+
+def check_parity(html, fields, reference='html.parser', kind=None):
+    """Comparer le résultat de chaque backend à celui du backend de référence
+
+    Retourne la liste des backends dont le résultat diffère.
+    """
+    expected = parse_page(html, fields, reference, kind)
+    return [name for name in available_backends() if parse_page(html, fields, name, kind) != expected]
+
+
+def benchmark(paths, fields, repeat=5):
+    """Micro-benchmark des backends sur des pages sauvegardées, avec contrôle de parité"""
+    pages = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            pages.append((path, f.read()))
+
+    mismatches = []
+    for path, html in pages:
+        for name in check_parity(html, fields):
+            mismatches.append((path, name))
+
+    timings = {}
+    for name in available_backends():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for _, html in pages:
+                parse_page(html, fields, name)
+        timings[name] = (time.perf_counter() - start) / (repeat * max(1, len(pages)))
+    return timings, mismatches
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    timings, mismatches = benchmark(sys.argv[1:], ALL_FIELDS)
+    reference = timings.get('html.parser')
+    for name, seconds in timings.items():
+        ratio = f" (x{reference / seconds:.2f})" if reference and seconds else ""
+        print(f"{name:12s} {seconds * 1000:8.2f} ms/page{ratio}")
+    for path, name in mismatches:
+        print(f"Résultat différent du backend de référence: {name} sur {path}")
+    sys.exit(1 if mismatches else 0)
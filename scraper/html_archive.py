@@ -0,0 +1,240 @@
+"""Archive compressée des pages HTML récupérées, pour réextraire les offres sans refaire de requêtes
+
+Chaque page validée est compressée seule (zlib) et ajoutée à la fin d'un segment pages_NNNN.dat;
+un index binaire à enregistrements de taille fixe (pages.idx: empreinte SHA-1 de l'URL, date de
+récupération, type de page, segment, offset, longueur) permet de retrouver une page par URL et date
+en projetant l'index en mémoire (mmap) sans le charger.
+
+Utilisation en ligne de commande (réextraction avec le parseur actuel, sur plusieurs cœurs):
+    python -m scraper.html_archive reextract --archive educarriere_data/archive [--workers 8]
+                                              [--output offres.ndjson] [--update-db]
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import Date, bindparam, update
+
+from api.dates import parse_date
+from api.models import JobOffer, get_engine
+from api.records import JobRecord
+from scraper.extraction import ALL_FIELDS, LISTING_FIELDS, parse_detail, parse_listing
+
+# Enregistrement d'index: sha1(url), date de récupération (epoch), type, niveau, segment, offset, longueur
+INDEX_RECORD = struct.Struct('<20sdBBHQI')
+KINDS = {'listing': 1, 'detail': 2}
+KIND_NAMES = {code: name for name, code in KINDS.items()}
+
+# Taille maximale d'un segment avant d'en ouvrir un nouveau
+SEGMENT_MAX_BYTES = 256 * 1024 * 1024
+ZLIB_LEVEL = 6
+
+# Nombre de pages réextraites par tâche envoyée à un processus
+REEXTRACT_BATCH_SIZE = 200
+
+
+def url_key(url):
+    """Clé d'index d'une URL (SHA-1 binaire)"""
+    return hashlib.sha1(url.encode('utf-8')).digest()
+
+
+class HTMLArchive:
+    """Archive en ajout seul des pages HTML, partagée par les threads d'un scraper"""
+
+    def __init__(self, archive_dir, segment_max_bytes=SEGMENT_MAX_BYTES):
+        self.archive_dir = archive_dir
+        self.segment_max_bytes = segment_max_bytes
+        self.index_path = os.path.join(archive_dir, 'pages.idx')
+        self.pages = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(archive_dir, exist_ok=True)
+
+        segments = sorted(name for name in os.listdir(archive_dir) if name.startswith('pages_') and name.endswith('.dat'))
+        self._segment = int(segments[-1][6:10]) if segments else 0
+        self._data = open(self._segment_path(self._segment), 'ab')
+        # Un enregistrement d'index incomplet (arrêt brutal pendant l'écriture) est tronqué
+        self._index = open(self.index_path, 'ab')
+        self._index.truncate(self._index.tell() - self._index.tell() % INDEX_RECORD.size)
+
+    def _segment_path(self, segment):
+        return os.path.join(self.archive_dir, f'pages_{segment:04d}.dat')
+
+    def put(self, url, kind, tier, html, fetched_at=None):
+        """Archiver une page; les données sont écrites avant l'entrée d'index qui les référence"""
+        data = html.encode('utf-8')
+        # L'URL est conservée dans l'enregistrement compressé pour que la réextraction puisse la retrouver
+        record = zlib.compress(url.encode('utf-8') + b'\n' + data, ZLIB_LEVEL)
+        with self._lock:
+            if self._data.tell() + len(record) > self.segment_max_bytes and self._data.tell() > 0:
+                self._data.close()
+                self._segment += 1
+                self._data = open(self._segment_path(self._segment), 'ab')
+            offset = self._data.tell()
+            self._data.write(record)
+            self._data.flush()
+            self._index.write(INDEX_RECORD.pack(url_key(url), fetched_at or time.time(), KINDS.get(kind, 0),
+                                                0 if tier == 'plain' else 1, self._segment, offset, len(record)))
+            self._index.flush()
+            self.pages += 1
+            self.raw_bytes += len(data)
+            self.stored_bytes += len(record)
+
+    def describe(self):
+        """Résumé lisible des pages archivées pendant la session"""
+        ratio = self.raw_bytes / self.stored_bytes if self.stored_bytes else 0
+        return (f"{self.pages} pages archivées, {self.raw_bytes / (1024 * 1024):.1f} Mo -> "
+                f"{self.stored_bytes / (1024 * 1024):.1f} Mo (x{ratio:.1f})")
+
+    def close(self):
+        with self._lock:
+            self._data.close()
+            self._index.close()
+
+
+def iter_index(archive_dir):
+    """Parcourir les entrées de l'index via mmap: (sha1, date, type, niveau, segment, offset, longueur)"""
+    index_path = os.path.join(archive_dir, 'pages.idx')
+    if not os.path.exists(index_path) or os.path.getsize(index_path) < INDEX_RECORD.size:
+        return
+    with open(index_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as index:
+        for offset in range(0, len(index) - INDEX_RECORD.size + 1, INDEX_RECORD.size):
+            yield INDEX_RECORD.unpack_from(index, offset)
+
+
+def read_record(archive_dir, segment, offset, length):
+    """Lire et décompresser une page archivée; retourne (url, html)"""
+    with open(os.path.join(archive_dir, f'pages_{segment:04d}.dat'), 'rb') as f:
+        f.seek(offset)
+        url, _, data = zlib.decompress(f.read(length)).partition(b'\n')
+    return url.decode('utf-8'), data.decode('utf-8')
+
+
+def lookup(archive_dir, url, before=None):
+    """Version archivée la plus récente d'une URL (antérieure à la date before si indiquée): (date, html) ou None"""
+    key = url_key(url)
+    best = None
+    for entry_key, fetched_at, _, _, segment, offset, length in iter_index(archive_dir):
+        if entry_key == key and (before is None or fetched_at <= before):
+            if best is None or fetched_at >= best[0]:
+                best = (fetched_at, segment, offset, length)
+    if best is None:
+        return None
+    return best[0], read_record(archive_dir, *best[1:])[1]
+
+
+def latest_entries(archive_dir):
+    """Dernière version archivée de chaque URL: liste de (type, segment, offset, longueur), dans l'ordre d'archivage"""
+    latest = {}
+    for key, fetched_at, kind, _, segment, offset, length in iter_index(archive_dir):
+        if key not in latest or fetched_at >= latest[key][0]:
+            latest[key] = (fetched_at, KIND_NAMES.get(kind), segment, offset, length)
+    return [entry[1:] for entry in sorted(latest.values())]
+
+
+def _reextract_batch(archive_dir, entries, backend):
+    """Réextraire un lot de pages dans un processus: retourne (offres des listings, détails par URL, erreurs)"""
+    jobs = []
+    details = {}
+    errors = 0
+    for kind, segment, offset, length in entries:
+        try:
+            url, html = read_record(archive_dir, segment, offset, length)
+            if kind == 'listing':
+                jobs.extend(parse_listing(html, ALL_FIELDS, backend).jobs)
+            else:
+                detail = parse_detail(html, ALL_FIELDS, backend)
+                if detail.title is not None:
+                    details[url] = detail.details
+        except Exception:
+            errors += 1
+    return jobs, details, errors
+
+
+def reextract(archive_dir, workers=None, backend=None, log=print):
+    """Réextraire toutes les offres de l'archive avec le parseur actuel, sur plusieurs processus
+
+    Retourne {url: offre} en combinant les champs du listing le plus récent et ceux de la page de détail.
+    """
+    start = time.perf_counter()
+    entries = latest_entries(archive_dir)
+    batches = [entries[i:i + REEXTRACT_BATCH_SIZE] for i in range(0, len(entries), REEXTRACT_BATCH_SIZE)]
+    log(f"Réextraction de {len(entries)} pages archivées en {len(batches)} lots...")
+
+    offers = {}
+    details = {}
+    errors = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_reextract_batch, archive_dir, batch, backend) for batch in batches]
+        # Les lots sont fusionnés dans l'ordre d'archivage: la page la plus récente l'emporte
+        for future in futures:
+            batch_jobs, batch_details, batch_errors = future.result()
+            for job in batch_jobs:
+                offers[job['url']] = job
+            details.update(batch_details)
+            errors += batch_errors
+
+    for url, detail in details.items():
+        offer = offers.setdefault(url, JobRecord(url=url))
+        offer.update(detail)
+
+    elapsed = time.perf_counter() - start
+    log(f"Réextraction terminée en {elapsed:.2f}s: {len(offers)} offres, {len(details)} pages de détail, "
+        f"{errors} pages en erreur ({len(entries) / elapsed if elapsed else 0:.0f} pages/s)")
+    return offers
+
+
+def update_offer_details(engine, offers, log=print):
+    """Mettre à jour en base les champs de détail des offres réextraites (par URL), par lots"""
+    table = JobOffer.__table__
+    fields = [field for field in ALL_FIELDS if field not in LISTING_FIELDS]
+    stmt = (update(table)
+            .where(table.c.url == bindparam('b_url'))
+            .values({field: bindparam(field) for field in fields}))
+    date_fields = {field for field in fields if isinstance(table.c[field].type, Date)}
+
+    def column_value(field, value):
+        return parse_date(value) if field in date_fields else value or ''
+
+    rows = [{'b_url': url, **{field: column_value(field, offer.get(field)) for field in fields}}
+            for url, offer in offers.items() if any(offer.get(field) for field in fields)]
+    updated = 0
+    for i in range(0, len(rows), 500):
+        with engine.begin() as conn:
+            updated += conn.execute(stmt, rows[i:i + 500]).rowcount
+    log(f"Base de données: {updated} offres mises à jour depuis l'archive")
+    return updated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive HTML des pages récupérées")
+    commands = parser.add_subparsers(dest="command", required=True)
+    reextract_parser = commands.add_parser("reextract", help="Réextraire les offres de l'archive avec le parseur actuel")
+    reextract_parser.add_argument("--archive", default="educarriere_data/archive",
+                                  help="Dossier de l'archive (défaut: educarriere_data/archive)")
+    reextract_parser.add_argument("--workers", type=int, default=None,
+                                  help="Nombre de processus (défaut: nombre de cœurs)")
+    reextract_parser.add_argument("--backend", default=None, help="Backend d'analyse HTML (défaut: fast)")
+    reextract_parser.add_argument("--output", default=None, help="Fichier NDJSON des offres réextraites")
+    reextract_parser.add_argument("--update-db", action="store_true",
+                                  help="Mettre à jour les champs de détail des offres en base")
+    reextract_parser.add_argument("--db", default="sqlite:///educarriere_jobs.db",
+                                  help="URL de connexion à la base de données (défaut: sqlite:///educarriere_jobs.db)")
+    args = parser.parse_args()
+
+    offers = reextract(args.archive, workers=args.workers, backend=args.backend)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            for offer in offers.values():
+                f.write(json.dumps({field: offer.get(field, "") for field in ALL_FIELDS}, ensure_ascii=False) + '\n')
+        print(f"Offres réextraites sauvegardées dans '{args.output}'")
+    if args.update_db:
+        update_offer_details(get_engine(args.db), offers)
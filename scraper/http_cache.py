@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+class ResponseCache:
+    """Cache disque des pages récupérées, adressé par le contenu de la requête (URL + options de rendu)
+
+    Chaque type de page a sa propre durée de validité, la taille totale est bornée par une éviction LRU.
+    """
+
+    # Durées de validité par type de page, en secondes
+    DEFAULT_TTLS = {
+        'listing': 15 * 60,  # Les pages de listing changent à chaque nouvelle offre
+        'detail': 30 * 24 * 3600,  # Les pages de détail ne changent presque jamais
+    }
+
+    def __init__(self, cache_dir, max_bytes=200 * 1024 * 1024, ttls=None, bypass=False):
+        """bypass ignore les entrées existantes (les pages récupérées sont tout de même mises en cache)"""
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttls = {**self.DEFAULT_TTLS, **(ttls or {})}
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Index en mémoire: clé -> [taille, dernier accès], reconstruit depuis le disque
+        self._entries = {}
+        self._total_bytes = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.html'):
+                    stat = os.stat(os.path.join(root, name))
+                    self._entries[name[:-5]] = [stat.st_size, stat.st_atime]
+                    self._total_bytes += stat.st_size
+
+    @staticmethod
+    def make_key(url, options):
+        """Clé stable dérivée de l'URL cible et des options de rendu"""
+        raw = json.dumps({'url': url, 'options': options}, sort_keys=True)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f'{key}.html')
+
+    def get(self, url, options, kind, max_age=None, count=True):
+        """Retourner le HTML en cache s'il est encore valide pour ce type de page, sinon None
+
+        max_age (en secondes) remplace la durée de validité du type de page pour cette lecture.
+        count=False n'ajoute rien aux statistiques: l'appelant qui essaie plusieurs clés pour une même
+        page compte lui-même le résultat avec record().
+        """
+        if self.bypass:
+            return None
+        key = self.make_key(url, options)
+        path = self._path(key)
+        with self._lock:
+            if key not in self._entries:
+                self.misses += count
+                return None
+            try:
+                stat = os.stat(path)
+                if time.time() - stat.st_mtime > (self.ttls.get(kind, 0) if max_age is None else max_age):
+                    self.misses += count
+                    return None
+                with open(path, 'r', encoding='utf-8') as f:
+                    html = f.read()
+            except OSError:
+                self._forget(key)
+                self.misses += count
+                return None
+            # Marquer l'accès sans toucher à la date d'écriture qui sert au TTL
+            now = time.time()
+            os.utime(path, (now, stat.st_mtime))
+            self._entries[key][1] = now
+            self.hits += count
+            return html
+
+    def record(self, hit):
+        """Compter une page servie par le cache (hit) ou non"""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def put(self, url, options, html):
+        """Enregistrer une page validée puis évincer les entrées les moins récemment utilisées si besoin"""
+        key = self.make_key(url, options)
+        path = self._path(key)
+        data = html.encode('utf-8')
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+            if key in self._entries:
+                self._total_bytes -= self._entries[key][0]
+            self._entries[key] = [len(data), time.time()]
+            self._total_bytes += len(data)
+            self._evict()
+
+    def invalidate(self, url, options):
+        """Supprimer une entrée (par exemple une page en cache qui ne passe plus la validation)"""
+        with self._lock:
+            self._forget(self.make_key(url, options))
+
+    def _forget(self, key):
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._total_bytes -= entry[0]
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        if self._total_bytes <= self.max_bytes:
+            return
+        for key, _ in sorted(self._entries.items(), key=lambda item: item[1][1]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            self._forget(key)
+
+    def describe(self):
+        """Résumé lisible de l'utilisation du cache pour les logs"""
+        return (f"{self.hits} hits, {self.misses} misses, {len(self._entries)} pages, "
+                f"{self._total_bytes / (1024 * 1024):.1f} Mo")
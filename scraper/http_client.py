@@ -0,0 +1,248 @@
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class EmptyResponseError(requests.exceptions.RequestException):
+    """Réponse HTTP réussie mais sans contenu"""
+
+
+class InvalidPageError(Exception):
+    """Page reçue mais dont la structure ne permet pas l'extraction (la requête sera relancée)
+
+    slow_down indique si l'échec doit aussi ralentir le limiteur de débit.
+    """
+
+    def __init__(self, message, slow_down=True):
+        super().__init__(message)
+        self.slow_down = slow_down
+
+
+class ScraperAPIClient:
+    """Client HTTP unique vers ScraperAPI: connexions keep-alive en pool, timeouts explicites et relances"""
+
+    API_URL = 'https://api.scraperapi.com/'
+    # Options de rendu JavaScript (le niveau le plus lent et le plus coûteux de ScraperAPI)
+    RENDER_OPTIONS = {
+        'render': 'true',
+        'render_js': 'true',  # S'assurer que JavaScript est rendu
+        'wait_for': '3000'  # Attendre 3 secondes pour le chargement du JS
+    }
+    # Niveaux de récupération, du moins cher au plus cher
+    FETCH_TIERS = [
+        ('plain', {}),
+        ('render', RENDER_OPTIONS),
+    ]
+    # Nombre d'échecs consécutifs d'un niveau avant de commencer directement au niveau suivant
+    TIER_DEMOTE_AFTER = 3
+    # Un niveau écarté est retenté toutes les N requêtes pour vérifier s'il fonctionne à nouveau
+    TIER_REPROBE_EVERY = 25
+
+    def __init__(self, api_key, rate_limiter, log=None, transport=None, pool_size=10,
+                 connect_timeout=10, read_timeout=90, max_retries=3, cache=None, tier_stats_file=None,
+                 archive=None):
+        """transport permet d'injecter un adaptateur requests (par exemple un transport local pour les tests)
+
+        cache est un ResponseCache optionnel, consulté pour les requêtes dont le type de page est indiqué.
+        tier_stats_file conserve entre les exécutions le niveau de récupération qui fonctionne pour chaque type de page.
+        archive est un HTMLArchive optionnel qui conserve chaque page validée récupérée sur le réseau.
+        """
+        self.api_key = api_key
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.archive = archive
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self._log = log or (lambda message, **fields: print(message))
+
+        self.session = requests.Session()
+        adapter = transport or HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # Statistiques par type de page et par niveau: {kind: {tier: {success, failure, streak}}, ...}
+        self.tier_stats_file = tier_stats_file
+        self.tier_stats = {}
+        self._tier_lock = threading.Lock()
+        self._tier_requests = 0
+        if tier_stats_file and os.path.exists(tier_stats_file):
+            try:
+                with open(tier_stats_file, 'r', encoding='utf-8') as f:
+                    self.tier_stats = json.load(f)
+            except (OSError, ValueError) as e:
+                self._log(f"Statistiques des niveaux de récupération illisibles, réinitialisation: {str(e)}")
+
+    def get(self, url, tier='render', **options):
+        """Effectuer une seule requête via ScraperAPI au niveau indiqué, régulée par le limiteur de débit"""
+        payload = {'api_key': self.api_key, 'url': url, **dict(self.FETCH_TIERS)[tier], **options}
+
+        self.rate_limiter.acquire()
+        response = self.session.get(self.API_URL, params=payload,
+                                    timeout=(self.connect_timeout, self.read_timeout))
+        self.rate_limiter.record_response(response)
+        response.raise_for_status()
+
+        if not response.text:
+            raise EmptyResponseError(f"Réponse vide pour {url}", response=response)
+        return response
+
+    def _tier_entry(self, kind, tier):
+        return self.tier_stats.setdefault(kind, {}).setdefault(tier, {'success': 0, 'failure': 0, 'streak': 0})
+
+    def _tiers_for(self, kind):
+        """Niveaux à essayer pour ce type de page, en partant du moins cher qui fonctionne encore"""
+        names = [name for name, _ in self.FETCH_TIERS]
+        if kind is None:
+            return names[-1:]
+        with self._tier_lock:
+            self._tier_requests += 1
+            reprobe = self._tier_requests % self.TIER_REPROBE_EVERY == 0
+            start = 0
+            while (not reprobe and start < len(names) - 1
+                   and self._tier_entry(kind, names[start])['streak'] >= self.TIER_DEMOTE_AFTER):
+                start += 1
+        return names[start:]
+
+    def _record_tier(self, kind, tier, success):
+        if kind is None:
+            return
+        with self._tier_lock:
+            entry = self._tier_entry(kind, tier)
+            if success:
+                entry['success'] += 1
+                entry['streak'] = 0
+            else:
+                entry['failure'] += 1
+                entry['streak'] += 1
+
+    def fetch(self, url, parse, label=None, max_retries=None, kind=None, max_age=None, **options):
+        """Récupérer une page et l'analyser avec parse(html), avec relances et ralentissement unifiés
+
+        parse lève InvalidPageError si la page doit être récupérée à nouveau.
+        kind ('listing' ou 'detail') active la récupération par niveaux: une requête simple sans rendu
+        est tentée d'abord, et le rendu JavaScript n'est utilisé que si parse rejette la page. Il active
+        aussi le cache disque avec la durée de validité de ce type de page; seules les pages validées
+        par parse sont mises en cache. max_age (en secondes) remplace cette durée de validité.
+        Retourne le résultat de parse, ou None après épuisement des tentatives.
+        """
+        label = label or url
+        max_retries = max_retries or self.max_retries
+        use_cache = self.cache is not None and kind is not None
+        tiers = self._tiers_for(kind)
+
+        if use_cache:
+            # Une page compte pour un seul succès ou échec du cache, quel que soit le nombre de niveaux essayés
+            for tier in tiers:
+                cache_options = {**dict(self.FETCH_TIERS)[tier], **options}
+                html = self.cache.get(url, cache_options, kind, max_age=max_age, count=False)
+                if html is None:
+                    continue
+                try:
+                    result = parse(html)
+                    self.cache.record(hit=True)
+                    self._log(f"Page en cache utilisée pour {label}", url=url, kind=kind, cache='hit')
+                    return result
+                except InvalidPageError:
+                    self.cache.invalidate(url, cache_options)
+            self.cache.record(hit=False)
+
+        # Le niveau atteint est conservé d'une tentative à l'autre: seule une page vide ou inexploitable
+        # fait monter d'un niveau; une erreur de requête (429, timeout, connexion) relance le même niveau
+        level = 0
+        for attempt in range(1, max_retries + 1):
+            while True:
+                tier = tiers[level]
+                self._log(f"Scraping de {label} (tentative {attempt}/{max_retries}, niveau {tier}, "
+                          f"débit actuel: {self.rate_limiter.describe()})...",
+                          url=url, kind=kind, attempt=attempt, tier=tier, rate=round(self.rate_limiter.rate, 3))
+                start = time.perf_counter()
+                try:
+                    response = self.get(url, tier=tier, **options)
+                    duration = time.perf_counter() - start
+                    result = parse(response.text)
+                    self._record_tier(kind, tier, success=True)
+                    self._log(f"Page récupérée pour {label} au niveau {tier} en {duration:.2f}s",
+                              url=url, kind=kind, attempt=attempt, tier=tier, duration=round(duration, 3),
+                              status=response.status_code, bytes=len(response.content))
+                    if use_cache:
+                        try:
+                            self.cache.put(url, {**dict(self.FETCH_TIERS)[tier], **options}, response.text)
+                        except OSError as e:
+                            self._log(f"Impossible de mettre en cache {label}: {str(e)}")
+                    if self.archive is not None and kind is not None:
+                        try:
+                            self.archive.put(url, kind, tier, response.text)
+                        except OSError as e:
+                            self._log(f"Impossible d'archiver {label}: {str(e)}")
+                    return result
+
+                except EmptyResponseError:
+                    if tier != tiers[-1]:
+                        # Une réponse vide sans rendu se comporte comme une page inexploitable: niveau suivant
+                        self._record_tier(kind, tier, success=False)
+                        self._log(f"Réponse vide pour {label} au niveau {tier}, passage au niveau supérieur...",
+                                  url=url, kind=kind, attempt=attempt, tier=tier, error='empty')
+                        level += 1
+                        continue
+                    self._log(f"Réponse vide pour {label}, nouvelle tentative...", url=url, kind=kind,
+                              attempt=attempt, tier=tier, error='empty')
+
+                except InvalidPageError as e:
+                    self._record_tier(kind, tier, success=False)
+                    if tier != tiers[-1]:
+                        # La page n'est pas exploitable sans rendu: passer au niveau suivant sans compter de tentative
+                        self._log(f"{e} ({label}) au niveau {tier}, passage au niveau supérieur...",
+                                  url=url, kind=kind, attempt=attempt, tier=tier, error='invalid_page')
+                        level += 1
+                        continue
+                    self._log(f"{e} ({label}), nouvelle tentative...", url=url, kind=kind, attempt=attempt,
+                              tier=tier, error='invalid_page')
+                    if e.slow_down:
+                        self.rate_limiter.on_failure(reason=str(e))
+
+                except requests.exceptions.RequestException as e:
+                    self._log(f"Erreur de requête HTTP lors du scraping de {label}: {str(e)}", url=url, kind=kind,
+                              attempt=attempt, tier=tier, error='http',
+                              status=e.response.status_code if e.response is not None else None,
+                              duration=round(time.perf_counter() - start, 3))
+                    # Les erreurs HTTP (dont 429) ont déjà ralenti le limiteur, pas les erreurs de connexion ni les
+                    # timeouts. Elles ne disent rien du besoin de rendu: le même niveau est relancé, sans le pénaliser
+                    if e.response is None:
+                        self.rate_limiter.on_failure(reason="erreur de connexion")
+
+                except Exception as e:
+                    self._log(f"Erreur lors du scraping de {label}: {str(e)}", url=url, kind=kind, attempt=attempt,
+                              tier=tier, error='exception')
+
+                # Les erreurs de requête et les échecs au niveau le plus élevé consomment une tentative
+                break
+
+        self._log(f"Échec après {max_retries} tentatives pour {label}", url=url, kind=kind, error='exhausted')
+        return None
+
+    def describe_tiers(self):
+        """Résumé lisible du niveau de récupération qui fonctionne pour chaque type de page"""
+        parts = []
+        for kind, tiers in sorted(self.tier_stats.items()):
+            counts = ", ".join(f"{tier}: {entry['success']} ok/{entry['failure']} échecs"
+                               for tier, entry in tiers.items())
+            parts.append(f"{kind} ({counts})")
+        return "; ".join(parts) or "aucune donnée"
+
+    def save_tier_stats(self):
+        """Conserver les statistiques des niveaux pour les prochaines exécutions"""
+        if not self.tier_stats_file:
+            return
+        with self._tier_lock:
+            with open(self.tier_stats_file, 'w', encoding='utf-8') as f:
+                json.dump(self.tier_stats, f, ensure_ascii=False, indent=4)
+
+    def close(self):
+        """Enregistrer les statistiques des niveaux et fermer les connexions du pool"""
+        self.save_tier_stats()
+        self.session.close()
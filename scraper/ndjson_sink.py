@@ -0,0 +1,144 @@
+import csv
+import json
+import os
+import time
+
+
+class NDJSONSink:
+    """Fichier NDJSON en ajout seul: une offre par ligne, écrite dès qu'elle est scrapée
+
+    Les écritures sont synchronisées sur disque (fsync) par lots de fsync_every offres ou au plus
+    tard toutes les fsync_interval secondes, pour ne rien perdre en cas d'arrêt brutal.
+    """
+
+    def __init__(self, path, fields, fsync_every=20, fsync_interval=5.0):
+        self.path = path
+        self.fields = fields
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.count = 0
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def write(self, job):
+        """Ajouter une offre au fichier, avec tous les champs dans l'ordre des colonnes"""
+        record = {field: job.get(field, "") for field in self.fields}
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.count += 1
+        self._pending += 1
+        if self._pending >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        """Forcer l'écriture sur disque des offres en attente"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def close(self, convert_to=()):
+        """Fermer le fichier puis le convertir dans les formats demandés ('csv', 'json')
+
+        Retourne la liste des fichiers produits par la conversion.
+        """
+        if self._file.closed:
+            return []
+        self.sync()
+        self._file.close()
+
+        outputs = []
+        base, _ = os.path.splitext(self.path)
+        for fmt in convert_to:
+            if fmt == 'csv':
+                outputs.append(ndjson_to_csv(self.path, f'{base}.csv', self.fields))
+            elif fmt == 'json':
+                outputs.append(ndjson_to_json(self.path, f'{base}.json'))
+            else:
+                raise ValueError(f"Format de conversion non supporté: {fmt}")
+        return outputs
+
+
+def iter_ndjson(path):
+    """Lire un fichier NDJSON ligne par ligne (une ligne tronquée en fin de fichier est ignorée)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+# Caractères qui peuvent suivre un élément d'un tableau JSON
+ELEMENT_TERMINATORS = frozenset(' \t\n\r,]')
+
+
+def iter_json_array(path, read_size=64 * 1024):
+    """Lire un tableau JSON élément par élément, sans charger le fichier en mémoire
+
+    Le fichier est lu par blocs de read_size caractères et chaque élément est décodé dès qu'il est
+    complet (JSONDecoder.raw_decode): la mémoire utilisée est bornée par la taille d'un élément.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ''
+        for chunk in iter(lambda: f.read(read_size), ''):
+            buffer = chunk.lstrip()
+            if buffer:
+                break
+        if not buffer.startswith('['):
+            raise ValueError(f"{path} ne contient pas un tableau JSON")
+        buffer = buffer[1:]
+        eof = False
+        while True:
+            buffer = buffer.lstrip()
+            if buffer.startswith(','):
+                buffer = buffer[1:].lstrip()
+            if buffer.startswith(']'):
+                return
+            # Garder au moins un bloc d'avance, pour que l'élément suivant soit en général complet
+            if len(buffer) < read_size and not eof:
+                chunk = f.read(read_size)
+                eof = not chunk
+                buffer += chunk
+                continue
+            try:
+                item, end = decoder.raw_decode(buffer)
+                # Un nombre coupé par la fin du tampon se décode quand même (1.5e10 lu comme 1): l'élément
+                # n'est complet que s'il est suivi d'un séparateur, ou s'il termine le fichier
+                complete = buffer[end] in ELEMENT_TERMINATORS if end < len(buffer) else eof
+            except ValueError:
+                complete = False
+            if not complete:
+                if eof:
+                    raise ValueError(f"{path}: tableau JSON tronqué ou invalide")
+                chunk = f.read(read_size)
+                eof = not chunk
+                buffer += chunk
+                continue
+            yield item
+            buffer = buffer[end:]
+
+
+def ndjson_to_csv(path, csv_path, fields):
+    """Convertir un fichier NDJSON en CSV sans le charger en mémoire"""
+    with open(csv_path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+        writer.writeheader()
+        for record in iter_ndjson(path):
+            writer.writerow({field: record.get(field, "") for field in fields})
+    return csv_path
+
+
+def ndjson_to_json(path, json_path):
+    """Convertir un fichier NDJSON en tableau JSON indenté sans le charger en mémoire"""
+    with open(json_path, 'w', encoding='utf-8') as f:
+        f.write('[')
+        for i, record in enumerate(iter_ndjson(path)):
+            f.write(',\n    ' if i else '\n    ')
+            f.write(json.dumps(record, ensure_ascii=False, indent=4).replace('\n', '\n    '))
+        f.write('\n]\n')
+    return json_path
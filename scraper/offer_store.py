@@ -0,0 +1,259 @@
+"""Magasin compacté des offres scrapées: un fichier NDJSON dédupliqué par ID d'offre et un index d'offsets
+
+Les sauvegardes progressives (progress/*.csv, *.json, *.ndjson) répètent les mêmes offres d'une session
+à l'autre. La compaction les fusionne dans offers_store.ndjson (une ligne par version d'offre, en ajout
+seul) et tient à jour offers_store.idx (offer_id, offset, longueur) pour lire une offre sans parcourir
+le fichier. Les fragments fusionnés sont ensuite supprimés. Une offre sans ID est rangée sous l'ID stable
+dérivé de son titre et de son entreprise (comme à l'importation en base); un fragment contenant une offre
+sans ID ni titre est conservé.
+
+Utilisation en ligne de commande:
+    python -m scraper.offer_store [--data-dir educarriere_data] [--min-age 3600] [--keep-fragments]
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import re
+import time
+
+from api.fingerprints import stable_offer_id
+from scraper.extraction import ALL_FIELDS
+from scraper.ndjson_sink import iter_json_array, iter_ndjson
+
+STORE_NAME = 'offers_store.ndjson'
+INDEX_NAME = 'offers_store.idx'
+
+# Fragments fusionnés par défaut, relativement au dossier de données. Les sauvegardes versionnées à la
+# racine (educarriere_progress_*) ne sont pas concernées: elles ne doivent pas être supprimées.
+FRAGMENT_PATTERNS = ['progress/*.ndjson', 'progress/*.json', 'progress/*.csv']
+
+# Horodatage de session dans le nom des fragments (AAAAMMJJ_HHMMSS)
+SESSION_TIMESTAMP_RE = re.compile(r'(\d{8}_\d{6})')
+
+# Au-delà de cette part de versions périmées, le magasin est réécrit
+REWRITE_STALE_RATIO = 0.25
+
+
+def iter_fragment(path):
+    """Lire les offres d'un fragment CSV, JSON ou NDJSON"""
+    if path.endswith('.ndjson'):
+        yield from iter_ndjson(path)
+    elif path.endswith('.json'):
+        yield from iter_json_array(path)
+    elif path.endswith('.csv'):
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            yield from csv.DictReader(f)
+
+
+def fragment_order(path):
+    """Clé de tri chronologique d'un fragment: horodatage de session du nom, sinon date de modification
+
+    Les dates de modification ne sont pas fiables après un checkout git, l'horodatage du nom l'est.
+    """
+    match = SESSION_TIMESTAMP_RE.search(os.path.basename(path))
+    return (match.group(1) if match else time.strftime('%Y%m%d_%H%M%S', time.localtime(os.path.getmtime(path))),
+            path)
+
+
+def normalize_offer(record):
+    """Offre avec tous les champs, dans l'ordre des colonnes, en chaînes"""
+    return {field: '' if record.get(field) is None else str(record.get(field)) for field in ALL_FIELDS}
+
+
+class OfferStore:
+    """Fichier NDJSON des offres uniques et index offer_id -> (offset, longueur) de la dernière version"""
+
+    def __init__(self, data_dir):
+        self.path = os.path.join(data_dir, STORE_NAME)
+        self.index_path = os.path.join(data_dir, INDEX_NAME)
+        self.index = {}
+        self.lines = 0  # Nombre de versions présentes dans le fichier, périmées comprises
+        self._load_index()
+
+    def _load_index(self):
+        """Charger l'index, ou le reconstruire s'il ne couvre pas tout le fichier (compaction interrompue)"""
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        indexed_end = 0
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                header = f.readline().split('\t')
+                if header[0] == '#' and len(header) == 3:
+                    self.lines, indexed_end = int(header[1]), int(header[2])
+                    for line in f:
+                        offer_id, offset, length = line.rstrip('\n').split('\t')
+                        self.index[offer_id] = (int(offset), int(length))
+        if indexed_end != size:
+            self._rebuild_index()
+
+    def _rebuild_index(self):
+        self.index = {}
+        self.lines = 0
+        if not os.path.exists(self.path):
+            return
+        offset = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    self.index[json.loads(line)['id']] = (offset, len(line))
+                    self.lines += 1
+                except (ValueError, KeyError):
+                    pass
+                offset += len(line)
+
+    def save_index(self):
+        """Écrire l'index de façon atomique (trié par ID pour des diffs lisibles)"""
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        with open(self.index_path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(f"#\t{self.lines}\t{size}\n")
+            for offer_id in sorted(self.index):
+                offset, length = self.index[offer_id]
+                f.write(f"{offer_id}\t{offset}\t{length}\n")
+        os.replace(self.index_path + '.tmp', self.index_path)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, offer_id):
+        return offer_id in self.index
+
+    def get(self, offer_id):
+        """Lire la dernière version d'une offre par accès direct, None si inconnue"""
+        if offer_id not in self.index:
+            return None
+        offset, length = self.index[offer_id]
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.read(length))
+
+    def __iter__(self):
+        """Parcourir les dernières versions des offres, dans l'ordre du fichier"""
+        with open(self.path, 'rb') as f:
+            for offset, length in sorted(self.index.values()):
+                f.seek(offset)
+                yield json.loads(f.read(length))
+
+    def add(self, offers):
+        """Ajouter les offres nouvelles ou modifiées; retourne (ajoutées, modifiées, inchangées)
+
+        Les versions identiques à la version en magasin ne sont pas réécrites.
+        """
+        added = changed = unchanged = 0
+        offset = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        with open(self.path, 'ab') as f:
+            for offer in offers:
+                line = (json.dumps(offer, ensure_ascii=False) + '\n').encode('utf-8')
+                if offer['id'] in self.index:
+                    current_offset, length = self.index[offer['id']]
+                    f.flush()
+                    with open(self.path, 'rb') as reader:
+                        reader.seek(current_offset)
+                        if reader.read(length) == line:
+                            unchanged += 1
+                            continue
+                    changed += 1
+                else:
+                    added += 1
+                f.write(line)
+                self.index[offer['id']] = (offset, len(line))
+                self.lines += 1
+                offset += len(line)
+            f.flush()
+            os.fsync(f.fileno())
+        return added, changed, unchanged
+
+    def rewrite(self):
+        """Réécrire le fichier sans les versions périmées"""
+        with open(self.path + '.tmp', 'wb') as out:
+            index = {}
+            offset = 0
+            for offer in self:
+                line = (json.dumps(offer, ensure_ascii=False) + '\n').encode('utf-8')
+                out.write(line)
+                index[offer['id']] = (offset, len(line))
+                offset += len(line)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(self.path + '.tmp', self.path)
+        self.index = index
+        self.lines = len(index)
+
+
+def compact(data_dir, patterns=FRAGMENT_PATTERNS, min_age=3600, prune=True, log=print):
+    """Fusionner les fragments de sauvegarde dans le magasin dédupliqué, puis supprimer les fragments fusionnés
+
+    Les fragments modifiés depuis moins de min_age secondes (session en cours) sont laissés de côté.
+    Les fragments sont lus du plus ancien au plus récent: la version la plus récente d'une offre l'emporte.
+    """
+    start = time.perf_counter()
+    now = time.time()
+    fragments = sorted({path for pattern in patterns for path in glob.glob(os.path.join(data_dir, pattern))},
+                       key=fragment_order)
+    fragments = [path for path in fragments if now - os.path.getmtime(path) >= min_age]
+    if not fragments:
+        log("Aucun fragment à compacter.")
+        return None
+
+    store = OfferStore(data_dir)
+    before = len(store)
+    fragment_bytes = sum(os.path.getsize(path) for path in fragments)
+
+    # Dédupliquer d'abord en mémoire entre fragments, pour n'écrire qu'une version par offre et par compaction
+    merged = {}
+    records = skipped = generated = 0
+    incomplete = []
+    for path in list(fragments):
+        try:
+            for record in iter_fragment(path):
+                records += 1
+                offer = normalize_offer(record)
+                if not offer['id']:
+                    if not offer['title']:
+                        # Rien pour identifier l'offre: le fragment est gardé pour ne pas la perdre
+                        skipped += 1
+                        if path not in incomplete:
+                            incomplete.append(path)
+                        continue
+                    offer['id'] = stable_offer_id(offer['title'], offer['entreprise'])
+                    generated += 1
+                merged.pop(offer['id'], None)
+                merged[offer['id']] = offer
+        except (OSError, ValueError, csv.Error) as e:
+            log(f"Fragment illisible laissé en place: {path} ({str(e)})")
+            fragments.remove(path)
+
+    added, changed, unchanged = store.add(merged.values())
+    stale = store.lines - len(store)
+    if store.lines and stale / store.lines > REWRITE_STALE_RATIO:
+        log(f"Réécriture du magasin: {stale} versions périmées sur {store.lines}")
+        store.rewrite()
+    store.save_index()
+
+    # Les fragments ne sont supprimés qu'une fois le magasin et son index écrits sur disque
+    if prune:
+        for path in fragments:
+            if path in incomplete:
+                log(f"Fragment conservé (offres sans ID ni titre): {path}")
+                continue
+            os.remove(path)
+
+    elapsed = time.perf_counter() - start
+    log(f"Compaction terminée en {elapsed:.2f}s: {len(fragments)} fragments ({records} lignes, "
+        f"{fragment_bytes / 1024:.0f} Ko) fusionnés, {added} offres ajoutées, {changed} modifiées, "
+        f"{unchanged} inchangées, {generated} sans ID rangées sous un ID généré, {skipped} sans ID ni titre "
+        f"ignorées; magasin: {before} -> {len(store)} offres, "
+        f"{os.path.getsize(store.path) / 1024:.0f} Ko"
+        f"{'' if prune else ' (fragments conservés)'}")
+    return store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compacter les sauvegardes progressives en un magasin d'offres dédupliqué")
+    parser.add_argument("--data-dir", default="educarriere_data", help="Dossier des données (défaut: educarriere_data)")
+    parser.add_argument("--min-age", type=int, default=3600,
+                        help="Âge minimal en secondes d'un fragment pour être compacté (défaut: 3600)")
+    parser.add_argument("--keep-fragments", action="store_true", help="Ne pas supprimer les fragments fusionnés")
+    args = parser.parse_args()
+
+    compact(args.data_dir, min_age=args.min_age, prune=not args.keep_fragments)
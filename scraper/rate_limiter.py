@@ -0,0 +1,100 @@
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+class AdaptiveRateLimiter:
+    """Token bucket partagé dont le débit s'adapte (AIMD) à la santé des réponses du serveur"""
+
+    # Codes HTTP considérés comme un signal de surcharge du serveur distant
+    THROTTLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+    def __init__(self, initial_rate=0.5, min_rate=0.05, max_rate=2.0,
+                 additive_increase=0.05, multiplicative_decrease=0.5, burst=1, log=None):
+        """Les débits sont exprimés en requêtes par seconde"""
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.additive_increase = additive_increase
+        self.multiplicative_decrease = multiplicative_decrease
+        self.burst = max(1, burst)
+        self._rate = min(max(initial_rate, min_rate), max_rate)
+        self._tokens = 1.0
+        self._last_refill = time.monotonic()
+        self._cooldown_until = 0.0
+        self._lock = threading.Lock()
+        self._log = log or (lambda message, **fields: None)
+
+    @property
+    def rate(self):
+        """Débit actuel en requêtes par seconde"""
+        return self._rate
+
+    def describe(self):
+        """Représentation lisible du débit actuel pour les logs"""
+        return f"{self._rate:.2f} req/s"
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self._rate)
+        self._last_refill = now
+
+    def acquire(self):
+        """Bloquer jusqu'à ce qu'un jeton soit disponible et que la pause Retry-After soit terminée"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._cooldown_until:
+                    wait = self._cooldown_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    wait = (1 - self._tokens) / self._rate
+            time.sleep(wait)
+
+    def on_success(self):
+        """Augmentation additive du débit après une réponse saine"""
+        with self._lock:
+            self._rate = min(self.max_rate, self._rate + self.additive_increase)
+
+    def on_failure(self, retry_after=None, reason=""):
+        """Diminution multiplicative du débit après un 429/5xx ou une réponse vide"""
+        with self._lock:
+            old_rate = self._rate
+            self._rate = max(self.min_rate, self._rate * self.multiplicative_decrease)
+            # Vider le seau pour que la prochaine requête attende au moins un intervalle complet
+            self._tokens = 0.0
+            if retry_after:
+                self._cooldown_until = max(self._cooldown_until, time.monotonic() + retry_after)
+        message = f"Ralentissement{f' ({reason})' if reason else ''}: débit {old_rate:.2f} -> {self._rate:.2f} req/s"
+        if retry_after:
+            message += f", Retry-After respecté: pause de {retry_after:.0f}s"
+        self._log(message, rate=round(self._rate, 3), retry_after=retry_after)
+
+    def record_response(self, response):
+        """Ajuster le débit selon le code HTTP et le contenu d'une réponse"""
+        if response.status_code in self.THROTTLE_STATUS_CODES:
+            retry_after = self.parse_retry_after(response.headers.get('Retry-After'))
+            self.on_failure(retry_after, reason=f"HTTP {response.status_code}")
+        elif not response.text:
+            self.on_failure(reason="réponse vide")
+        elif response.ok:
+            self.on_success()
+
+    @staticmethod
+    def parse_retry_after(value):
+        """Convertir un en-tête Retry-After (secondes ou date HTTP) en nombre de secondes"""
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_date = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_date.tzinfo is None:
+            retry_date = retry_date.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_date - datetime.now(timezone.utc)).total_seconds())
@@ -0,0 +1,85 @@
+import json
+import queue
+import threading
+from datetime import datetime
+
+
+class RunLogger:
+    """Journal de session non bloquant
+
+    Les messages sont mis en file et écrits par un thread dédié: une ligne JSON par événement dans le
+    fichier (avec les champs structurés: page, offer_id, attempt, duration...) et une ligne lisible
+    sur la console. Le fichier est vidé par lots, au plus tard toutes les flush_interval secondes.
+    """
+
+    def __init__(self, path, flush_interval=2.0, batch_size=200, console=True):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.console = console
+        self.dropped = 0
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name='run-logger', daemon=True)
+        self._writer.start()
+
+    def log(self, message, **fields):
+        """Mettre un événement en file (ne bloque jamais l'appelant)"""
+        if self._closed:
+            return
+        event = {
+            'ts': datetime.now().isoformat(timespec='milliseconds'),
+            'thread': threading.current_thread().name,
+            'message': message,
+        }
+        event.update(fields)
+        self._queue.put(event)
+
+    @staticmethod
+    def format_console(event):
+        """Représentation lisible d'un événement, au format historique des logs"""
+        timestamp = event['ts'][:19].replace('T', ' ')
+        return f"[{timestamp}] {event['message']}"
+
+    def _run(self):
+        pending = []
+        stop = False
+        with open(self.path, 'a', encoding='utf-8') as f:
+            while not stop:
+                try:
+                    event = self._queue.get(timeout=self.flush_interval)
+                    if event is None:
+                        stop = True
+                    else:
+                        pending.append(event)
+                        # Vider la file d'un coup pour écrire par lots
+                        while len(pending) < self.batch_size:
+                            event = self._queue.get_nowait()
+                            if event is None:
+                                stop = True
+                                break
+                            pending.append(event)
+                except queue.Empty:
+                    pass
+
+                if not pending:
+                    continue
+                lines = []
+                for event in pending:
+                    if self.console:
+                        print(self.format_console(event))
+                    try:
+                        lines.append(json.dumps(event, ensure_ascii=False, default=str))
+                    except (TypeError, ValueError):
+                        self.dropped += 1
+                f.write('\n'.join(lines) + '\n')
+                f.flush()
+                pending = []
+
+    def close(self):
+        """Écrire les événements restants et arrêter le thread d'écriture"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
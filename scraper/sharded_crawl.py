@@ -0,0 +1,180 @@
+"""Crawl réparti entre plusieurs processus, pour les rattrapages ponctuels de centaines de pages
+
+Les pages de listing sont réparties entre les shards (page i -> shard i % shards). Chaque shard est un
+processus avec son propre EducarriereScraper (client HTTP, limiteur de débit, journal et dossier de
+sortie). La déduplication passe par la base de données: avant de récupérer les détails d'une page, un
+shard demande à la base quelles offres y sont déjà, et l'upsert sur la clé unique offer_id règle les
+collisions entre shards (une offre peut glisser d'une page à l'autre pendant le crawl).
+
+Chaque shard a son propre limiteur de débit: le débit total est celui d'un crawl normal multiplié par
+le nombre de shards.
+
+Utilisation en ligne de commande:
+    python -m scraper.sharded_crawl --first-page 1 --last-page 300 --shards 4
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import select
+
+from api.models import JobOffer
+from scraper import educarriere_scraper
+from scraper.extraction import ALL_FIELDS
+from scraper.ndjson_sink import NDJSONSink, iter_ndjson
+
+# Nombre d'IDs par requête de vérification en base
+KNOWN_IDS_CHUNK_SIZE = 500
+
+
+def split_pages(first_page, last_page, shards):
+    """Répartir les pages entre les shards en alternance, pour que chacun avance sur toute la plage"""
+    pages = list(range(first_page, last_page + 1))
+    return [pages[i::shards] for i in range(shards)]
+
+
+def known_offer_ids(offer_ids):
+    """IDs déjà présents dans la table job_offers, parmi ceux demandés (lu en base à chaque appel)"""
+    table = JobOffer.__table__
+    offer_ids = list(offer_ids)
+    known = set()
+    with educarriere_scraper.engine.connect() as conn:
+        for i in range(0, len(offer_ids), KNOWN_IDS_CHUNK_SIZE):
+            chunk = offer_ids[i:i + KNOWN_IDS_CHUNK_SIZE]
+            known.update(conn.execute(select(table.c.offer_id).where(table.c.offer_id.in_(chunk))).scalars())
+    return known
+
+
+def forget_inherited_connections():
+    """Abandonner, sans les fermer, les connexions SQLite héritées du processus parent par fork
+
+    Le module du scraper définit deux moteurs (celui de Session en tête de module, puis celui redéfini
+    en bas): un processus fils ne doit réutiliser aucune de leurs connexions, qui restent au parent.
+    """
+    for engine in {educarriere_scraper.Session.kw['bind'], educarriere_scraper.engine}:
+        engine.dispose(close=False)
+
+
+def crawl_shard(shard, pages, api_key, output_dir, scraper_options, progress):
+    """Crawler les pages d'un shard dans un processus; retourne le bilan du shard
+
+    Les offres de chaque page sont écrites en base dès que leurs détails sont récupérés, et un
+    message de progression est envoyé au processus principal après chaque page.
+    """
+    forget_inherited_connections()
+    start = time.perf_counter()
+    shard_dir = os.path.join(output_dir, f'shard_{shard}')
+    scraper = educarriere_scraper.EducarriereScraper(api_key, output_dir=shard_dir, progress_formats=(),
+                                                     **scraper_options)
+    summary = {'shard': shard, 'pages': len(pages), 'found': 0, 'new': 0, 'inserted': 0, 'updated': 0,
+               'failed_pages': [], 'progress_file': scraper.progress_file}
+    sink = NDJSONSink(scraper.progress_file, scraper.all_possible_fields)
+    try:
+        for done, page in enumerate(pages, start=1):
+            jobs = scraper.fetch_listing_page(page)
+            if jobs is None:
+                summary['failed_pages'].append(page)
+                progress.put((shard, done, len(pages), page, None, 0, 0))
+                continue
+
+            # La base fait foi: un autre shard a pu enregistrer ces offres depuis le démarrage
+            known = known_offer_ids(job['id'] for job in jobs if job.get('id'))
+            new_jobs = [job for job in jobs if job.get('id') and job['id'] not in known]
+            detailed = scraper.scrape_details_concurrently(new_jobs) if new_jobs else []
+            for job in detailed:
+                sink.write(job)
+            result = scraper.update_database(detailed) if detailed else None
+
+            summary['found'] += len(jobs)
+            summary['new'] += len(detailed)
+            if result is not None:
+                summary['inserted'] += result.inserted
+                summary['updated'] += result.updated
+            progress.put((shard, done, len(pages), page, len(jobs), len(detailed),
+                          result.inserted if result is not None else 0))
+    finally:
+        sink.close()
+        scraper.close()
+    summary['duration'] = time.perf_counter() - start
+    return summary
+
+
+def crawl_sharded(api_key, first_page, last_page, shards=4, output_dir='educarriere_data/backfill',
+                  progress_dir='educarriere_data/progress', scraper_options=None, log=print):
+    """Crawler une plage de pages avec un pool de processus et fusionner les résultats des shards
+
+    Retourne la liste des bilans par shard. Les offres détaillées de tous les shards sont fusionnées
+    dans un fichier NDJSON unique de progress_dir, repris ensuite par la compaction.
+    """
+    start = time.perf_counter()
+    scraper_options = {'max_workers': 2, 'incremental': False, **(scraper_options or {})}
+    os.makedirs(output_dir, exist_ok=True)
+    assignments = [pages for pages in split_pages(first_page, last_page, shards) if pages]
+    log(f"Crawl réparti des pages {first_page} à {last_page} sur {len(assignments)} shards")
+
+    manager = multiprocessing.Manager()
+    progress = manager.Queue()
+    summaries = []
+    with ProcessPoolExecutor(max_workers=len(assignments)) as executor:
+        futures = [executor.submit(crawl_shard, shard, pages, api_key, output_dir, scraper_options, progress)
+                   for shard, pages in enumerate(assignments)]
+        # Afficher la progression de chaque shard pendant que les processus travaillent
+        while not all(future.done() for future in futures) or not progress.empty():
+            try:
+                shard, done, total, page, found, new, inserted = progress.get(timeout=1)
+            except queue.Empty:
+                continue
+            if found is None:
+                log(f"[shard {shard}] page {page} ({done}/{total}): échec de la récupération du listing")
+            else:
+                log(f"[shard {shard}] page {page} ({done}/{total}): {found} offres, {new} nouvelles, "
+                    f"{inserted} ajoutées en base")
+        for future in futures:
+            try:
+                summaries.append(future.result())
+            except Exception as e:
+                log(f"Erreur dans un shard: {str(e)}")
+    manager.shutdown()
+
+    # Fusionner les sauvegardes des shards (une offre vue par deux shards n'est gardée qu'une fois)
+    os.makedirs(progress_dir, exist_ok=True)
+    merged_file = os.path.join(progress_dir, f"educarriere_backfill_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ndjson")
+    seen = set()
+    merged = NDJSONSink(merged_file, ALL_FIELDS)
+    for summary in sorted(summaries, key=lambda summary: summary['shard']):
+        if os.path.exists(summary['progress_file']):
+            for job in iter_ndjson(summary['progress_file']):
+                if job['id'] not in seen:
+                    seen.add(job['id'])
+                    merged.write(job)
+    merged.close()
+
+    for summary in summaries:
+        log(f"[shard {summary['shard']}] {summary['pages']} pages en {summary['duration']:.1f}s: "
+            f"{summary['found']} offres, {summary['new']} nouvelles, {summary['inserted']} ajoutées, "
+            f"{summary['updated']} mises à jour"
+            + (f", pages en échec: {summary['failed_pages']}" if summary['failed_pages'] else ""))
+    failed_pages = sorted(page for summary in summaries for page in summary['failed_pages'])
+    log(f"Crawl réparti terminé en {time.perf_counter() - start:.1f}s: "
+        f"{sum(summary['inserted'] for summary in summaries)} offres ajoutées, {len(seen)} offres uniques "
+        f"dans {merged_file}" + (f", {len(failed_pages)} pages à relancer: {failed_pages}" if failed_pages else ""))
+    return summaries
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl réparti entre plusieurs processus pour un rattrapage de pages")
+    parser.add_argument("--first-page", type=int, default=1, help="Première page de listing (défaut: 1)")
+    parser.add_argument("--last-page", type=int, required=True, help="Dernière page de listing")
+    parser.add_argument("--shards", type=int, default=4, help="Nombre de processus (défaut: 4)")
+    parser.add_argument("--workers", type=int, default=2,
+                        help="Workers de détails par shard (défaut: 2)")
+    parser.add_argument("--output", default="educarriere_data/backfill",
+                        help="Dossier de travail des shards (défaut: educarriere_data/backfill)")
+    args = parser.parse_args()
+
+    crawl_sharded(os.environ.get('SCRAPY_API_KEY'), args.first_page, args.last_page, shards=args.shards,
+                  output_dir=args.output, scraper_options={'max_workers': args.workers})
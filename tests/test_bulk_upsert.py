@@ -0,0 +1,15 @@
+from api.bulk_upsert import upsert_job_offers
+from api.models import create_tables, get_engine
+
+
+def test_repeated_offer_in_batch_is_counted_as_duplicate(tmp_path):
+    engine = get_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    create_tables(engine)
+    rows = [{'offer_id': '1', 'title': 'Comptable'},
+            {'offer_id': '2', 'title': 'Juriste'},
+            {'offer_id': '1', 'title': 'Comptable senior'}]
+
+    result = upsert_job_offers(engine, rows, log=lambda message: None)
+
+    assert (result.inserted, result.updated, result.unchanged, result.duplicates) == (2, 0, 0, 1)
+    assert upsert_job_offers(engine, rows[1:], log=lambda message: None).unchanged == 2
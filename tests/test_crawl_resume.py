@@ -0,0 +1,89 @@
+import importlib
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from sqlalchemy import select
+
+from api.models import JobOffer, create_tables, get_engine, get_session_maker
+from scraper.rate_limiter import AdaptiveRateLimiter
+
+LISTING = '''<html><div class="container">
+<div class="col-md-6 wow fadeInLeft"><div class="rt-post post-md style-8"><a class="racing">Emploi</a>
+<h4 class="post-title"><a href="https://emploi.educarriere.ci/offre-2001-comptable">Comptable</a></h4></div></div>
+<div class="col-md-6 wow fadeInLeft"><div class="rt-post post-md style-8"><a class="racing">Emploi</a>
+<h4 class="post-title"><a href="https://emploi.educarriere.ci/offre-2002-juriste">Juriste</a></h4></div></div>
+</div></html>'''
+
+DETAIL = '''<html><h2 class="title">Offre</h2>
+<ul class="list-group"><li class="list-group-item">Lieu: Abidjan</li></ul>
+<div class="post-body"><div class="col-xl-9"><p>ACME SA</p></div></div></html>'''
+
+
+class SiteTransport(BaseAdapter):
+    """Transport local: pages de listing et de détail, détails en 404 tant que details_down est vrai"""
+
+    def __init__(self, details_down):
+        super().__init__()
+        self.details_down = details_down
+
+    def send(self, request, **kwargs):
+        url = parse_qs(urlparse(request.url).query)['url'][0]
+        response = Response()
+        response.request = request
+        response.url = request.url
+        response.encoding = 'utf-8'
+        if '/offre-' in url and self.details_down:
+            response.status_code = 404
+            response._content = b'Not Found'
+        else:
+            response.status_code = 200
+            response._content = (DETAIL if '/offre-' in url else LISTING).encode('utf-8')
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def scraper_module(tmp_path, monkeypatch):
+    # Le module ouvre sa base au chargement, relativement au dossier courant
+    monkeypatch.chdir(tmp_path)
+    module = importlib.import_module('scraper.educarriere_scraper')
+    engine = get_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    create_tables(engine)
+    monkeypatch.setattr(module, 'engine', engine)
+    monkeypatch.setattr(module, 'Session', get_session_maker(engine))
+    return module
+
+
+def run_crawl(module, output_dir, transport, resume):
+    scraper = module.EducarriereScraper('key', output_dir=str(output_dir), transport=transport, resume=resume,
+                                        rate_limiter=AdaptiveRateLimiter(initial_rate=1000, max_rate=1000),
+                                        use_cache=False, progress_formats=(), archive_pages=False)
+    try:
+        jobs = scraper.scrape_all_jobs_with_details(max_pages=1)
+        scraper.update_database(jobs)
+        return jobs, scraper.journal.summary()
+    finally:
+        scraper.close()
+
+
+def stored_offers(module):
+    with module.engine.connect() as conn:
+        return dict(conn.execute(select(JobOffer.offer_id, JobOffer.lieu)).all())
+
+
+def test_failed_detail_fetch_is_retried_on_resume(scraper_module, tmp_path):
+    jobs, summary = run_crawl(scraper_module, tmp_path / 'data', SiteTransport(details_down=True), resume=False)
+
+    assert jobs == []
+    assert stored_offers(scraper_module) == {}
+    assert '2 offres en attente' in summary and '0 en base' in summary
+
+    jobs, summary = run_crawl(scraper_module, tmp_path / 'data', SiteTransport(details_down=False), resume=True)
+
+    assert sorted(job['id'] for job in jobs) == ['2001', '2002']
+    assert stored_offers(scraper_module) == {'2001': 'Abidjan', '2002': 'Abidjan'}
+    assert '0 offres en attente' in summary and '2 en base' in summary
@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from scraper.extraction import ALL_FIELDS, available_backends, check_parity, parse_detail, parse_listing
+
+PAGES_DIR = os.path.join(os.path.dirname(__file__), 'pages')
+PAGES = sorted(name for name in os.listdir(PAGES_DIR) if name.endswith('.html'))
+
+
+def read_page(name):
+    with open(os.path.join(PAGES_DIR, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('name', PAGES)
+def test_backends_agree_on_sample_pages(name):
+    assert check_parity(read_page(name), ALL_FIELDS) == []
+
+
+def test_listing_fields():
+    page = parse_listing(read_page('listing.html'), ALL_FIELDS)
+    assert [job['id'] for job in page.jobs] == ['101234', '101235']
+    assert page.jobs[0]['code'] == 'C101234'
+    assert page.jobs[0]['date_limite'] == '30/03/2025'
+
+
+@pytest.mark.parametrize('backend', available_backends())
+def test_detail_sections(backend):
+    page = parse_detail(read_page('detail.html'), ALL_FIELDS, backend)
+    assert page.title == 'Comptable senior'
+    assert page.details['entreprise'] == 'ACME SA'
+    assert page.details['profil_poste'] == 'Diplômé en finance'
+    assert page.details['email_candidature'] == 'rh@acme.ci'
+
+
+@pytest.mark.parametrize('backend', available_backends())
+def test_last_section_does_not_read_past_content(backend):
+    page = parse_detail(read_page('detail_last_section.html'), ALL_FIELDS, backend)
+    assert page.details['description_poste'] == "Rédaction d'actes"
+    assert page.details['dossier_candidature'] == ''
+
+
+def test_fields_restrict_extraction():
+    listing = parse_listing(read_page('listing.html'), ['id', 'title'])
+    assert listing.jobs[0]['id'] == '101234'
+    assert listing.jobs[0]['title'] == 'Comptable senior'
+    assert listing.jobs[0]['code'] == ''
+
+    detail = parse_detail(read_page('detail.html'), ['lieu', 'email_candidature'])
+    assert detail.details['lieu'] == 'Abidjan'
+    assert detail.details['email_candidature'] == 'rh@acme.ci'
+    assert 'description_poste' not in detail.details
+    assert 'metier' not in detail.details
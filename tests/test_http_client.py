@@ -0,0 +1,121 @@
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+from requests.models import Response
+
+from scraper.http_cache import ResponseCache
+from scraper.http_client import InvalidPageError, ScraperAPIClient
+from scraper.rate_limiter import AdaptiveRateLimiter
+
+PAGE = '<html><h2 class="title">Poste</h2></html>'
+
+
+class RenderOnlyTransport(BaseAdapter):
+    """Transport local: corps vide sans rendu JavaScript, page complète avec rendu"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def send(self, request, **kwargs):
+        query = parse_qs(urlparse(request.url).query)
+        rendered = bool(query.get('render'))
+        self.calls.append('render' if rendered else 'plain')
+        response = Response()
+        response.request = request
+        response.url = request.url
+        response.encoding = 'utf-8'
+        response.status_code = 200
+        response._content = PAGE.encode('utf-8') if rendered else b''
+        return response
+
+    def close(self):
+        pass
+
+
+class FlakyPlainTransport(BaseAdapter):
+    """Transport local: une première requête en erreur (429 ou timeout), puis la page complète sans rendu"""
+
+    def __init__(self, error):
+        super().__init__()
+        self.error = error
+        self.calls = []
+
+    def send(self, request, **kwargs):
+        query = parse_qs(urlparse(request.url).query)
+        self.calls.append('render' if query.get('render') else 'plain')
+        if len(self.calls) == 1 and self.error == 'timeout':
+            raise requests.exceptions.ReadTimeout("délai dépassé", request=request)
+        response = Response()
+        response.request = request
+        response.url = request.url
+        response.encoding = 'utf-8'
+        if len(self.calls) == 1:
+            response.status_code = 429
+            response._content = b'Too Many Requests'
+        else:
+            response.status_code = 200
+            response._content = PAGE.encode('utf-8')
+        return response
+
+    def close(self):
+        pass
+
+
+def parse(html):
+    if 'class="title"' not in html:
+        raise InvalidPageError("Page sans titre")
+    return html
+
+
+def make_client(transport, cache=None):
+    limiter = AdaptiveRateLimiter(initial_rate=1000, max_rate=1000, burst=1000)
+    return ScraperAPIClient('key', limiter, log=lambda message, **fields: None, transport=transport, cache=cache)
+
+
+def test_empty_plain_response_moves_up_to_render():
+    transport = RenderOnlyTransport()
+    client = make_client(transport)
+
+    assert client.fetch('https://emploi.educarriere.ci/offre-1', parse, kind='detail') == PAGE
+    assert transport.calls == ['plain', 'render']
+    assert client.tier_stats['detail']['plain'] == {'success': 0, 'failure': 1, 'streak': 1}
+    assert client.tier_stats['detail']['render']['success'] == 1
+
+
+def test_plain_tier_is_demoted_after_repeated_empty_responses():
+    transport = RenderOnlyTransport()
+    client = make_client(transport)
+
+    for i in range(ScraperAPIClient.TIER_DEMOTE_AFTER + 1):
+        assert client.fetch(f'https://emploi.educarriere.ci/offre-{i}', parse, kind='detail') == PAGE
+    # Après TIER_DEMOTE_AFTER échecs, la requête suivante commence directement au rendu
+    assert transport.calls[-1:] == ['render']
+    assert transport.calls.count('plain') == ScraperAPIClient.TIER_DEMOTE_AFTER
+
+
+def test_cache_counts_one_lookup_per_page(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache'))
+    client = make_client(RenderOnlyTransport(), cache=cache)
+    urls = [f'https://emploi.educarriere.ci/offre-{i}' for i in range(3)]
+
+    for url in urls:
+        client.fetch(url, parse, kind='detail')
+    assert (cache.hits, cache.misses) == (0, 3)
+
+    # Les pages sont en cache au niveau render: l'absence au niveau plain n'est pas un échec de plus
+    for url in urls:
+        client.fetch(url, parse, kind='detail')
+    assert (cache.hits, cache.misses) == (3, 3)
+
+
+@pytest.mark.parametrize('error', ['429', 'timeout'])
+def test_request_errors_retry_the_same_tier(error):
+    transport = FlakyPlainTransport(error)
+    client = make_client(transport)
+
+    assert client.fetch('https://emploi.educarriere.ci/offre-1', parse, kind='detail') == PAGE
+    assert transport.calls == ['plain', 'plain']
+    assert client.tier_stats['detail']['plain'] == {'success': 1, 'failure': 0, 'streak': 0}
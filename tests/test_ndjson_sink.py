@@ -0,0 +1,27 @@
+import json
+
+import pytest
+
+from scraper.ndjson_sink import iter_json_array
+
+
+@pytest.mark.parametrize('read_size', [1, 2, 3, 7, 64 * 1024])
+def test_iter_json_array_matches_json_load(tmp_path, read_size):
+    items = [1.5e10, -12, 'texte', {'id': '101234', 'title': 'Comptable'}, [1, 2], None, True, 0.25]
+    path = tmp_path / 'offres.json'
+    path.write_text('  \n' + json.dumps(items, indent=1), encoding='utf-8')
+    assert list(iter_json_array(str(path), read_size=read_size)) == items
+
+
+def test_iter_json_array_does_not_split_numbers_at_buffer_edge(tmp_path):
+    path = tmp_path / 'nombre.json'
+    path.write_text('[1.5e10]', encoding='utf-8')
+    assert list(iter_json_array(str(path), read_size=1)) == [1.5e10]
+
+
+@pytest.mark.parametrize('content', ['[1.5e10', '[{"id": "1"}', '[12x]'])
+def test_iter_json_array_rejects_truncated_arrays(tmp_path, content):
+    path = tmp_path / 'tronque.json'
+    path.write_text(content, encoding='utf-8')
+    with pytest.raises(ValueError):
+        list(iter_json_array(str(path), read_size=2))
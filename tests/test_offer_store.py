@@ -0,0 +1,38 @@
+import json
+import os
+
+from scraper.offer_store import OfferStore, compact
+
+
+def write_fragment(path, offers):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(offers, f)
+
+
+def test_compact_leaves_top_level_progress_files(tmp_path):
+    top_level = tmp_path / 'educarriere_progress_20250302_035716_jusqu_a_page_10.json'
+    write_fragment(str(top_level), [{'id': '1', 'title': 'Comptable'}])
+    write_fragment(str(tmp_path / 'progress' / 'educarriere_progress_20250303_010000.json'),
+                   [{'id': '2', 'title': 'Juriste'}])
+
+    store = compact(str(tmp_path), min_age=0, log=lambda message: None)
+
+    assert top_level.exists()
+    assert os.listdir(tmp_path / 'progress') == []
+    assert '2' in store and '1' not in store
+
+
+def test_compact_stores_offers_without_id_under_generated_id(tmp_path):
+    kept = tmp_path / 'progress' / 'educarriere_progress_20250303_010000.json'
+    write_fragment(str(kept), [{'id': '', 'title': '', 'entreprise': 'ACME'}])
+    generated = tmp_path / 'progress' / 'educarriere_progress_20250303_020000.json'
+    write_fragment(str(generated), [{'id': '', 'title': 'Comptable', 'entreprise': 'ACME'}])
+
+    compact(str(tmp_path), min_age=0, log=lambda message: None)
+
+    store = OfferStore(str(tmp_path))
+    assert [offer['title'] for offer in store] == ['Comptable']
+    assert store.get(next(iter(store.index)))['id'].startswith('gen_')
+    assert kept.exists()
+    assert not generated.exists()